@@ -0,0 +1,322 @@
+"""
+Scaling benchmark of the build and query phases of Thorup's algorithm.
+
+Sweeps graph families, vertex counts, edge densities and maximum edge weights, times every
+phase separately, times the queries of the heap-based engines on the same graphs and sources,
+measures the bytes per vertex and per edge retained by the built model and its query state,
+and writes the results, including the fitted scaling exponents, as JSON:
+
+    python benchmark.py --vertices 1000 2000 4000 --output benchmark.json
+
+With --split, it times the splits of Gabow's split-findmin structure alone instead, which
+should take a nearly constant time each in every split order:
+
+    python benchmark.py --split --vertices 4000 16000 64000
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from random import seed, randrange
+from typing import Dict, List, Sequence
+
+from thorup.algs.dijkstra import DijkstraModel
+from thorup.algs.mstalgorithm import MsbBucketMstAlgorithm
+from thorup.algs.thorup import ThorupModel
+from thorup.ds.csrgraph import CsrGraph
+from thorup.ds.splitfindmin import SplitFindminStructureGabow
+from thorup.ds.unvisited import GabowUnvisitedDataStructure, MinTreeUnvisitedDataStructure
+from thorup.util.graphgenerator import RandomGraphGenerator
+from thorup.util.vectorgenerator import VectorizedGraphGenerator
+
+FAMILIES = ('random', 'grid', 'geometric', 'power_law', 'path')
+BACKENDS = {'gabow': GabowUnvisitedDataStructure, 'min_tree': MinTreeUnvisitedDataStructure}
+PHASES = ('minimum_spanning_tree', 'component_tree', 'unvisited_data_structure', 'find_shortest_paths')
+# heap-based engines, whose queries are timed on the same graphs and sources for comparison
+BASELINES = {'binary_heap': False, 'radix_heap': True}
+SPLIT_ORDERS = ('ascending', 'descending', 'random')
+
+
+def generate_graph(family: str, vertices_number: int, maximum_edge_weight: int, edges_per_vertex: int) -> CsrGraph:
+    # the vectorized generators are seeded from the seeded random module
+    graph_seed = randrange(2 ** 32)
+
+    if family == 'random':
+        return VectorizedGraphGenerator.generate_connected_random_graph(vertices_number, edges_per_vertex,
+                                                                        maximum_edge_weight, seed=graph_seed)
+    if family == 'grid':
+        columns = max(1, int(math.sqrt(vertices_number)))
+        return VectorizedGraphGenerator.generate_grid_graph(max(1, vertices_number // columns), columns,
+                                                            maximum_edge_weight, seed=graph_seed)
+    if family == 'geometric':
+        return VectorizedGraphGenerator.generate_geometric_graph(vertices_number, 2 * edges_per_vertex,
+                                                                 maximum_edge_weight, seed=graph_seed)
+    if family == 'power_law':
+        return VectorizedGraphGenerator.generate_power_law_graph(vertices_number, edges_per_vertex,
+                                                                 maximum_edge_weight, seed=graph_seed)
+    if family == 'path':
+        return RandomGraphGenerator.generate_path_graph(vertices_number, maximum_edge_weight)
+
+    raise ValueError('{} is no graph family.'.format(family))
+
+
+def build(graph: CsrGraph, backend: str, timings: Dict[str, float] = None) -> ThorupModel:
+    """
+    Builds a model phase by phase, adding the wall time of every phase to timings.
+    The query state is not allocated, so that the model holds the index alone.
+    """
+    timings = {} if timings is None else timings
+    model = ThorupModel(graph, BACKENDS[backend])
+
+    start = time.perf_counter()
+    model.construct_minimum_spanning_tree(MsbBucketMstAlgorithm)
+    timings['minimum_spanning_tree'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.component_tree = model.construct_component_tree()
+    timings['component_tree'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.unvisited_data_structure = model.unvisited_data_structure_type(model.vertices_number,
+                                                                         model.component_tree)
+    timings['unvisited_data_structure'] = time.perf_counter() - start
+
+    return model
+
+
+def measure_memory(graph: CsrGraph, backend: str, source_vertex: int) -> Dict[str, float]:
+    """
+    Repeats the build and one query under tracemalloc, so that tracing does not distort the timings.
+    The graph itself is allocated before and not counted.
+    :return: the peak numbers of bytes allocated by the build and by the query, and the numbers of
+    bytes retained by the built model and by the per-query state, also per vertex and per edge
+    """
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        model = build(graph, backend)
+        gc.collect()
+        model_bytes, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        model.find_shortest_paths(source_vertex)
+        _, query_peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        query_state_bytes = tracemalloc.get_traced_memory()[0] - model_bytes
+    finally:
+        tracemalloc.stop()
+
+    edges_number = graph.get_arcs_number() // 2
+
+    return {'build_peak_bytes': build_peak,
+            'query_peak_bytes': query_peak - model_bytes,
+            'model_bytes': model_bytes,
+            'model_bytes_per_vertex': model_bytes / graph.vertices_number,
+            'model_bytes_per_edge': model_bytes / edges_number if edges_number else None,
+            'query_state_bytes': query_state_bytes,
+            'query_state_bytes_per_vertex': query_state_bytes / graph.vertices_number}
+
+
+def benchmark_graph(family: str,
+                    vertices_number: int,
+                    maximum_edge_weight: int,
+                    edges_per_vertex: int,
+                    backend: str,
+                    queries_number: int,
+                    memory: bool) -> Dict:
+    graph = generate_graph(family, vertices_number, maximum_edge_weight, edges_per_vertex)
+    source_vertices = [randrange(graph.vertices_number) for _ in range(queries_number)]
+    arcs_number = graph.get_arcs_number()
+
+    timings = {}
+    model = build(graph, backend, timings)
+
+    start = time.perf_counter()
+    model.get_query()
+    query_state_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for source_vertex in source_vertices:
+        model.find_shortest_paths(source_vertex)
+    timings['find_shortest_paths'] = (time.perf_counter() - start) / queries_number
+
+    baseline_timings = {}
+
+    for baseline, radix_heap in BASELINES.items():
+        baseline_model = DijkstraModel(graph, radix_heap)
+        start = time.perf_counter()
+        for source_vertex in source_vertices:
+            baseline_model.find_shortest_paths(source_vertex)
+        baseline_timings[baseline] = (time.perf_counter() - start) / queries_number
+
+    throughput = {phase + '_arcs_per_second': arcs_number / timings[phase] if timings[phase] else None
+                  for phase in PHASES}
+    throughput['queries_per_second'] = 1 / timings['find_shortest_paths'] if timings['find_shortest_paths'] else None
+
+    result = {'family': family,
+              'backend': backend,
+              'vertices_number': graph.vertices_number,
+              'edges_number': arcs_number // 2,
+              'edges_per_vertex': edges_per_vertex,
+              'maximum_edge_weight': maximum_edge_weight,
+              'queries_number': queries_number,
+              'seconds': timings,
+              'query_state_seconds': query_state_seconds,
+              'baseline_seconds': baseline_timings,
+              'throughput': throughput}
+
+    if memory:
+        result['memory'] = measure_memory(graph, backend, source_vertices[0])
+
+    return result
+
+
+def compute_scaling_exponent(sizes: Sequence[float], seconds: Sequence[float]) -> float:
+    """
+    Least squares slope of log(seconds) over log(sizes), so that seconds ~ sizes ** exponent.
+    """
+    points = [(math.log(size), math.log(second)) for size, second in zip(sizes, seconds) if size > 0 and second > 0]
+
+    if len(points) < 2:
+        return None
+
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+
+    if not variance:
+        return None
+
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def compute_scaling_exponents(results: List[Dict]) -> List[Dict]:
+    """
+    Fits the exponents of every phase against the number of edges, separately for every
+    series of results that differ only in the number of vertices.
+    """
+    series = {}
+
+    for result in results:
+        key = (result['family'], result['backend'], result['edges_per_vertex'], result['maximum_edge_weight'])
+        series.setdefault(key, []).append(result)
+
+    exponents = []
+
+    for (family, backend, edges_per_vertex, maximum_edge_weight), series_results in series.items():
+        sizes = [result['edges_number'] for result in series_results]
+        exponents.append({'family': family,
+                          'backend': backend,
+                          'edges_per_vertex': edges_per_vertex,
+                          'maximum_edge_weight': maximum_edge_weight,
+                          'exponents': {phase: compute_scaling_exponent(sizes, [result['seconds'][phase]
+                                                                                for result in series_results])
+                                        for phase in PHASES}})
+
+    return exponents
+
+
+def run_benchmark(families: Sequence[str] = FAMILIES,
+                  vertices_numbers: Sequence[int] = (1000, 2000, 4000, 8000),
+                  edges_per_vertex_values: Sequence[int] = (4,),
+                  maximum_edge_weights: Sequence[int] = (100, 10 ** 6),
+                  backends: Sequence[str] = tuple(BACKENDS),
+                  queries_number: int = 3,
+                  memory: bool = True,
+                  random_seed: int = 0) -> Dict:
+    seed(random_seed)
+    results = []
+
+    for family in families:
+        # the structured families have a fixed density
+        for edges_per_vertex in edges_per_vertex_values if family not in ('grid', 'path') else (None,):
+            for maximum_edge_weight in maximum_edge_weights:
+                for backend in backends:
+                    for vertices_number in vertices_numbers:
+                        results.append(benchmark_graph(family, vertices_number, maximum_edge_weight,
+                                                       edges_per_vertex, backend, queries_number, memory))
+
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': random_seed,
+            'results': results,
+            'scaling_exponents': compute_scaling_exponents(results)}
+
+
+def benchmark_splits(elements_number: int, split_order: str) -> float:
+    """
+    Splits a split-findmin structure of random costs into singletons.
+    :return: the mean seconds per split
+    """
+    structure = SplitFindminStructureGabow(elements_number, elements_number)
+    elements = [structure.add(item, randrange(1, 10 ** 6)) for item in range(elements_number)]
+    structure.initialize_head()
+
+    split_positions = list(range(elements_number - 1))
+    if split_order == 'descending':
+        split_positions.reverse()
+    elif split_order == 'random':
+        split_positions.sort(key=lambda _: randrange(2 ** 32))
+
+    start = time.perf_counter()
+    for split_position in split_positions:
+        elements[split_position].split()
+
+    return (time.perf_counter() - start) / max(1, len(split_positions))
+
+
+def run_split_benchmark(elements_numbers: Sequence[int] = (4000, 16000, 64000),
+                        split_orders: Sequence[str] = SPLIT_ORDERS,
+                        random_seed: int = 0) -> Dict:
+    seed(random_seed)
+    results = [{'split_order': split_order,
+                'elements_number': elements_number,
+                'seconds_per_split': benchmark_splits(elements_number, split_order)}
+               for split_order in split_orders for elements_number in elements_numbers]
+
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': random_seed,
+            'results': results,
+            'scaling_exponents': {split_order: compute_scaling_exponent(
+                [result['elements_number'] for result in results if result['split_order'] == split_order],
+                [result['seconds_per_split'] for result in results if result['split_order'] == split_order])
+                for split_order in split_orders}}
+
+
+def main(arguments: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--families', nargs='+', choices=FAMILIES, default=FAMILIES)
+    parser.add_argument('--vertices', nargs='+', type=int, default=[1000, 2000, 4000, 8000])
+    parser.add_argument('--edges-per-vertex', nargs='+', type=int, default=[4])
+    parser.add_argument('--maximum-edge-weights', nargs='+', type=int, default=[100, 10 ** 6])
+    parser.add_argument('--backends', nargs='+', choices=tuple(BACKENDS), default=tuple(BACKENDS))
+    parser.add_argument('--queries', type=int, default=3, help='queries per graph')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory measurement')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON file, standard output by default')
+    parser.add_argument('--split', action='store_true',
+                        help='time the splits of the split-findmin structure with as many elements as vertices')
+    arguments = parser.parse_args(arguments)
+
+    if arguments.split:
+        report = run_split_benchmark(arguments.vertices, SPLIT_ORDERS, arguments.seed)
+    else:
+        report = run_benchmark(arguments.families, arguments.vertices, arguments.edges_per_vertex,
+                               arguments.maximum_edge_weights, arguments.backends, arguments.queries,
+                               not arguments.no_memory, arguments.seed)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,32 @@
+import asyncio
+import heapq
+import json
+import os
+import sys
+import tempfile
 import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
 
+import numpy as np
 from pythonds import Graph
 
-from thorup.algs.mstalgorithm import KruskalMstAlgorithm
+from benchmark import build, run_benchmark, run_split_benchmark, PHASES, SPLIT_ORDERS
+
+from thorup.algs.dijkstra import DijkstraModel
+from thorup.algs.distancecache import DistanceCache
+from thorup.algs.mstalgorithm import BoruvkaMstAlgorithm, KruskalMstAlgorithm, MsbBucketMstAlgorithm
 from thorup.algs.thorup import ThorupModel
+from thorup.ds.csrgraph import CsrGraph
+from thorup.ds.splitfindmin import SplitFindminStructureGabow
+from thorup.ds.ufstructure import UnionFindStructureArray
+from thorup.ds.unvisited import GabowUnvisitedDataStructure, MinTreeUnvisitedDataStructure
 from thorup.util.graphgenerator import RandomGraphGenerator
+from thorup.util.graphloader import GraphLoader
+from thorup.util.indexfile import INDEX_FILE_MAGIC, INDEX_FILE_VERSION
+from thorup.util.queryservice import QueryService
+from thorup.util.vectorgenerator import VectorizedGraphGenerator
 
 
 class TestFindPass(unittest.TestCase):
@@ -28,5 +50,516 @@ class TestFindPass(unittest.TestCase):
         result = thorup.find_shortest_paths(0)
         self.assertEquals([0,1,2], result)
 
+    def test_csr_graph(self):
+        random = Random(42)
+
+        for _ in range(20):
+            graph = generate_connected_graph(random, random.randint(2, 60), random.choice([2, 100, 10 ** 6]))
+            source_vertex = random.randrange(graph.vertices_number)
+
+            for mst_algorithm in (KruskalMstAlgorithm, MsbBucketMstAlgorithm):
+                thorup = ThorupModel(graph)
+                thorup.construct_minimum_spanning_tree(mst_algorithm)
+                thorup.construct_other_data_structures()
+
+                self.assertEqual(2 * (graph.vertices_number - 1), thorup.msb_minimum_spanning_tree.get_arcs_number())
+                self.assertEqual(dijkstra(graph, source_vertex), thorup.find_shortest_paths(source_vertex))
+
+    def test_invalid_graphs(self):
+        with self.assertRaises(ValueError):
+            ThorupModel(CsrGraph.from_edge_arrays(4, [0, 2], [1, 3], [3, 5])).build()
+
+        with self.assertRaises(ValueError):
+            ThorupModel(CsrGraph.from_edge_arrays(3, [0, 1], [1, 2], [2 ** 62, 2 ** 62])).build()
+
+        weight = 2 ** 62 - 1
+        graph = CsrGraph.from_edge_arrays(3, [0, 1], [1, 2], [weight, weight])
+        self.assertEqual([0, weight, 2 * weight], ThorupModel(graph).find_shortest_paths(0))
+
+        # the distances along a path of six 2^61 edges exceed sys.maxsize
+        path = CsrGraph.from_edge_arrays(6, range(5), range(1, 6), [2 ** 61] * 5)
+        self.assertRaises(ValueError, ThorupModel(path).build)
+
+        # a same-class update of a tree edge and a rebuild below the root, each of which would
+        # take the spanning tree weight to 2^63 - 1 or beyond
+        weights = [2 ** 61, 2 ** 61, 2 ** 60, 2 ** 60, 1]
+
+        for edge, weight in ((0, 2 ** 62 - 1), (4, 2 ** 61 - 1)):
+            thorup = ThorupModel(CsrGraph.from_edge_arrays(6, range(5), range(1, 6), weights))
+            thorup.build()
+
+            with self.assertRaises(ValueError):
+                thorup.update_edge_weight(edge, edge + 1, weight)
+
+            self.assertRaises(ValueError, thorup.find_shortest_paths, 0)
+            thorup.update_edge_weight(edge, edge + 1, weights[edge])
+            self.assertEqual(dijkstra(thorup.source_graph, 0), thorup.find_shortest_paths(0))
+
+    def test_repeated_queries(self):
+        graph = generate_connected_graph(Random(7), 40, 1000)
+
+        thorup = ThorupModel(graph)
+        thorup.construct_minimum_spanning_tree(MsbBucketMstAlgorithm)
+        thorup.construct_other_data_structures()
+
+        for source_vertex in list(range(graph.vertices_number)) + [0, 0]:
+            self.assertEqual(dijkstra(graph, source_vertex), thorup.find_shortest_paths(source_vertex))
+
+    def test_min_tree_unvisited_data_structure(self):
+        graph = generate_connected_graph(Random(13), 50, 10 ** 6)
+
+        thorup = ThorupModel(graph, MinTreeUnvisitedDataStructure)
+        thorup.construct_minimum_spanning_tree(MsbBucketMstAlgorithm)
+        thorup.construct_other_data_structures()
+
+        for source_vertex in range(graph.vertices_number):
+            self.assertEqual(dijkstra(graph, source_vertex), thorup.find_shortest_paths(source_vertex))
+
+        self.assertEqual([dijkstra(graph, 5), dijkstra(graph, 0)], thorup.find_shortest_paths_many([5, 0], processes=2))
+
+    def test_dijkstra_model(self):
+        random = Random(17)
+
+        for _ in range(10):
+            graph = generate_connected_graph(random, random.randint(2, 60), random.choice([2, 100, 10 ** 12]))
+            source_vertex = random.randrange(graph.vertices_number)
+            thorup = ThorupModel(graph)
+            thorup.build()
+
+            for radix_heap in (False, True):
+                model = DijkstraModel(graph, radix_heap)
+                model.build()
+                self.assertEqual(thorup.find_shortest_paths(source_vertex), model.find_shortest_paths(source_vertex))
+
+    def test_metrics(self):
+        graph = generate_connected_graph(Random(19), 40, 1000)
+
+        thorup = ThorupModel(graph)
+        self.assertIsNone(thorup.metrics)
+        metrics = thorup.enable_metrics()
+        thorup.build()
+        thorup.find_shortest_paths(0)
+
+        self.assertEqual(graph.vertices_number, metrics.operation_counts['visit'])
+        self.assertEqual(graph.get_arcs_number(), metrics.operation_counts['relax'])
+        self.assertEqual(thorup.component_tree.get_nodes_number() - graph.vertices_number,
+                         metrics.operation_counts['expand'])
+        self.assertEqual(metrics.operation_counts['expand'],
+                         sum(level_counts['expand'] for level_counts in metrics.level_histogram.values()))
+        self.assertTrue(all(seconds > 0 for seconds in metrics.phase_seconds.values()))
+
+        # every vertex, the source included, has its super distance decreased at least once
+        self.assertLessEqual(graph.vertices_number, metrics.operation_counts['decrease_cost'])
+        self.assertGreaterEqual(graph.get_arcs_number() + 1, metrics.operation_counts['decrease_cost'])
+        self.assertEqual(sum(children_number - 1 for children_number in thorup.component_tree.children_numbers
+                             if children_number), metrics.operation_counts['split'])
+
+        thorup = ThorupModel(graph, MinTreeUnvisitedDataStructure)
+        metrics = thorup.enable_metrics()
+        thorup.find_shortest_paths(0)
+
+        self.assertEqual(0, metrics.operation_counts['split'])
+        self.assertLessEqual(graph.vertices_number, metrics.operation_counts['decrease_cost'])
+
+    def test_find_shortest_path(self):
+        random = Random(23)
+        graph = generate_connected_graph(random, 60, 1000)
+        weights = {}
+
+        for source, target, weight in graph.get_edges():
+            weights[source, target] = weights[target, source] = min(weight, weights.get((source, target), weight))
+
+        thorup = ThorupModel(graph)
+        thorup.build()
+
+        for _ in range(30):
+            source_vertex, target_vertex = random.randrange(60), random.randrange(60)
+            distance, path = thorup.find_shortest_path(source_vertex, target_vertex)
+
+            self.assertEqual(dijkstra(graph, source_vertex)[target_vertex], distance)
+            self.assertEqual([source_vertex, target_vertex], [path[0], path[-1]])
+            self.assertEqual(distance, sum(weights[u, v] for u, v in zip(path, path[1:])))
+
+        self.assertEqual(dijkstra(graph, 5), thorup.find_shortest_paths(5))
+
+        unreachable = ThorupModel(CsrGraph.from_edge_arrays(4, [0, 2], [1, 3], [3, 5]))
+        self.assertRaises(ValueError, unreachable.find_shortest_path, 0, 3)
+
+        distances = thorup.find_shortest_paths_within(5, 0)
+        self.assertEqual({5: 0}, distances)
+        self.assertEqual([5], thorup.get_shortest_path(5))
+        self.assertRaises(ValueError, thorup.get_shortest_path, (5 + 1) % 60)
+
+    def test_find_shortest_paths_within(self):
+        random = Random(29)
+        graph = generate_connected_graph(random, 80, 100)
+
+        thorup = ThorupModel(graph)
+        thorup.build()
+
+        for source_vertex in range(0, 80, 7):
+            distances = dijkstra(graph, source_vertex)
+
+            for max_distance in (0, 50, max(distances) // 2, max(distances)):
+                self.assertEqual({vertex: distance for vertex, distance in enumerate(distances)
+                                  if distance <= max_distance},
+                                 thorup.find_shortest_paths(source_vertex, max_distance))
+
+        thorup = ThorupModel(CsrGraph.from_edge_arrays(1, [], [], []))
+        thorup.build()
+        self.assertEqual({0: 0}, thorup.find_shortest_paths(0, 5))
+        self.assertEqual([0], thorup.find_shortest_paths(0))
+        self.assertEqual((0, [0]), thorup.find_shortest_path(0, 0))
+
+    def test_update_edge_weight(self):
+        random = Random(31)
+
+        for unvisited_data_structure_type in (GabowUnvisitedDataStructure, MinTreeUnvisitedDataStructure):
+            graph = generate_connected_graph(random, 60, 1000)
+            edges = list(graph.get_edges())
+            thorup = ThorupModel(graph, unvisited_data_structure_type)
+            thorup.build()
+
+            for _ in range(30):
+                source_vertex, target_vertex, _ = random.choice(edges)
+                thorup.update_edge_weight(source_vertex, target_vertex, random.randint(1, 1000))
+                query_vertex = random.randrange(60)
+
+                self.assertEqual(dijkstra(graph, query_vertex), thorup.find_shortest_paths(query_vertex))
+
+        with self.assertRaises(AttributeError):
+            thorup.update_edge_weight(0, 60, 1)
+
+        with self.assertRaises(ValueError):
+            thorup.update_edge_weight(*edges[0][:2], 0)
+
+        for vertices_number in (100, 10000):
+            # a path whose first eight vertices form a component below the one of the whole path
+            weights = [1] + [16] * 6 + [1000] * (vertices_number - 8)
+            graph = CsrGraph.from_edge_arrays(vertices_number, range(vertices_number - 1), range(1, vertices_number),
+                                              weights)
+            thorup = ThorupModel(graph)
+            thorup.build()
+            tree_targets = thorup.msb_minimum_spanning_tree.targets
+
+            thorup.update_edge_weight(0, 1, 2)
+
+            # the msb class change only touches the arcs of the eight vertices, whatever the size
+            self.assertEqual(list(range(8)), sorted(thorup.msb_minimum_spanning_tree.patched_arcs))
+            self.assertIs(tree_targets, thorup.msb_minimum_spanning_tree.targets)
+            self.assertEqual(dijkstra(graph, 0), thorup.find_shortest_paths(0))
+
+        # a heavier chord outside the tree leaves the trees as they are
+        graph = CsrGraph.from_edge_arrays(100, list(range(99)) + [0], list(range(1, 100)) + [50], [1] * 99 + [4])
+        thorup = ThorupModel(graph)
+        thorup.build()
+        component_tree, minimum_spanning_tree = thorup.component_tree, thorup.msb_minimum_spanning_tree
+
+        thorup.update_edge_weight(0, 50, 1000)
+
+        self.assertIs(component_tree, thorup.component_tree)
+        self.assertIs(minimum_spanning_tree, thorup.msb_minimum_spanning_tree)
+        self.assertEqual({}, minimum_spanning_tree.patched_arcs)
+        self.assertEqual(dijkstra(graph, 0), thorup.find_shortest_paths(0))
+
+    def test_find_shortest_paths_many(self):
+        graph = generate_connected_graph(Random(11), 30, 100)
+        source_vertices = [3, 0, 29, 3]
+
+        thorup = ThorupModel(graph)
+        result = thorup.find_shortest_paths_many(source_vertices, processes=2)
+
+        self.assertEqual([dijkstra(graph, source_vertex) for source_vertex in source_vertices], result)
+
+    def test_boruvka_mst_algorithm(self):
+        graph = generate_connected_graph(Random(17), 300, 1000)
+        tree = MsbBucketMstAlgorithm.spawn_tree(graph)
+
+        for processes in (1, 2):
+            self.assertEqual(sorted(tree.get_edges()),
+                             sorted(BoruvkaMstAlgorithm.spawn_tree(graph, processes).get_edges()))
+
+        forest = BoruvkaMstAlgorithm.spawn_tree(CsrGraph.from_edge_arrays(5, [0, 2, 3], [1, 3, 4], [3, 5, 1]), 2)
+        self.assertEqual([(0, 1, 3), (2, 3, 5), (3, 4, 1)], sorted(forest.get_edges()))
+
+    def test_query_contexts(self):
+        graph = generate_connected_graph(Random(19), 60, 1000)
+        thorup = ThorupModel(graph)
+        first_query, second_query = thorup.create_query(), thorup.create_query()
+
+        distance, path = first_query.find_shortest_path(0, 59)
+        self.assertEqual(dijkstra(graph, 7), second_query.find_shortest_paths(7))
+        self.assertEqual(dijkstra(graph, 0)[59], distance)
+        self.assertEqual(path, first_query.get_shortest_path(59))
+
+        with ThreadPoolExecutor(4) as executor:
+            result = list(executor.map(lambda source_vertex: thorup.create_query().find_shortest_paths(source_vertex),
+                                       range(10)))
+
+        self.assertEqual([dijkstra(graph, source_vertex) for source_vertex in range(10)], result)
+
+        # bounded queries leave the split-findmin structure of all vertices unbuilt
+        query = thorup.create_query()
+        distances = dijkstra(graph, 3)
+        self.assertEqual({vertex: distance for vertex, distance in enumerate(distances) if distance <= 300},
+                         query.find_shortest_paths(3, 300))
+        self.assertIsNone(query.full_unvisited_data_structure.split_findmin_structure)
+        self.assertEqual(distances, query.find_shortest_paths(3))
+        self.assertEqual(distances[59], query.find_shortest_path(3, 59)[0])
+        self.assertEqual([3], query.get_shortest_path(3))
+
+    def test_distance_cache(self):
+        graph = generate_connected_graph(Random(29), 50, 1000)
+        row_bytes = sys.getsizeof(array('q', [0] * graph.vertices_number))
+
+        cache = DistanceCache(ThorupModel(graph), 2 * row_bytes)
+        self.assertEqual(dijkstra(graph, 4), cache.find_shortest_paths(4))
+        self.assertEqual(dijkstra(graph, 4)[9], cache.get_distance(9, 4))
+        self.assertEqual({'rows': 1, 'used_bytes': row_bytes, 'hits': 1, 'misses': 1, 'evictions': 0},
+                         cache.get_statistics())
+        cache.get_distance(7, 4)
+        cache.get_distance(8, 9)
+        self.assertEqual([4, 8], list(cache.rows))
+
+        cache = DistanceCache(ThorupModel(graph), 2 * row_bytes, 'lfu')
+        for source_vertex in (1, 1, 2, 3):
+            cache.get_row(source_vertex)
+        self.assertEqual([1, 3], list(cache.rows))
+
+        cache.update_edge_weight(*next(graph.get_edges())[:2], 1)
+        self.assertEqual(dijkstra(graph, 1), cache.find_shortest_paths(1))
+
+    def test_index_file(self):
+        graph = generate_connected_graph(Random(13), 50, 1000)
+
+        thorup = ThorupModel(graph)
+        thorup.construct_minimum_spanning_tree(MsbBucketMstAlgorithm)
+        thorup.construct_other_data_structures()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.idx')
+            thorup.save_index(path)
+            loaded = ThorupModel.load_index(path)
+
+            for source_vertex in (0, 17, 49):
+                self.assertEqual(dijkstra(graph, source_vertex), loaded.find_shortest_paths(source_vertex))
+
+            self.assertEqual(list(thorup.msb_minimum_spanning_tree.weights),
+                             list(loaded.msb_minimum_spanning_tree.weights))
+
+            with open(path, 'rb') as file:
+                content = file.read()
+
+            # the magic is followed by the version, a little-endian 32-bit integer
+            for header in (b'NOINDEX!' + content[8:12],
+                           INDEX_FILE_MAGIC + (INDEX_FILE_VERSION + 1).to_bytes(4, 'little')):
+                corrupted_path = os.path.join(directory, 'corrupted.idx')
+
+                with open(corrupted_path, 'wb') as file:
+                    file.write(header + content[12:])
+
+                with self.assertRaises(ValueError):
+                    ThorupModel.load_index(corrupted_path)
+
+    def test_query_service(self):
+        graph = generate_connected_graph(Random(23), 40, 100)
+        thorup = ThorupModel(graph)
+        thorup.build()
+        requests = [{'id': 1, 'source': 3}, {'id': 2, 'source': 3, 'target': 30}, {'id': 3, 'source': 3},
+                    {'id': 4, 'source': 5, 'max_distance': 0}, {'id': 5, 'source': 40}, {'id': 6}]
+
+        async def query(index_path: str, socket_path: str) -> dict:
+            service = QueryService(index_path, processes=1)
+            server = await service.start_unix_server(socket_path)
+
+            try:
+                reader, writer = await asyncio.open_unix_connection(socket_path)
+                writer.write(b''.join(json.dumps(request).encode() + b'\n' for request in requests))
+                await writer.drain()
+                responses = [json.loads(await reader.readline()) for _ in requests]
+                writer.close()
+                return {response['id']: response for response in responses}
+            finally:
+                server.close()
+                await service.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            thorup.save_index(os.path.join(directory, 'graph.idx'))
+            responses = asyncio.run(query(os.path.join(directory, 'graph.idx'), os.path.join(directory, 'socket')))
+
+        self.assertEqual(dijkstra(graph, 3), responses[1]['distances'])
+        self.assertEqual(responses[1], dict(responses[3], id=1))
+        self.assertEqual(dijkstra(graph, 3)[30], responses[2]['distance'])
+        self.assertEqual([3, 30], [responses[2]['path'][0], responses[2]['path'][-1]])
+        self.assertEqual({'5': 0}, responses[4]['distances'])
+        self.assertIn('error', responses[5])
+        self.assertIn('error', responses[6])
+
+    def test_benchmark(self):
+        report = run_benchmark(('random', 'grid'), (20, 40), (3,), (10,), ('min_tree',), queries_number=1)
+
+        self.assertEqual(4, len(report['results']))
+        self.assertEqual(2, len(report['scaling_exponents']))
+        self.assertEqual(set(PHASES), set(report['results'][0]['seconds']))
+        self.assertIn('build_peak_bytes', report['results'][0]['memory'])
+        self.assertGreater(report['results'][0]['memory']['model_bytes_per_edge'], 0)
+        # the model bytes are measured before the query state is allocated, which is reported apart
+        self.assertGreater(report['results'][0]['memory']['query_state_bytes'], 0)
+        self.assertIsNone(build(generate_connected_graph(Random(3), 20, 10), 'gabow').query)
+
+        report = run_split_benchmark((50, 100))
+        self.assertEqual(2 * len(SPLIT_ORDERS), len(report['results']))
+        self.assertEqual(set(SPLIT_ORDERS), set(report['scaling_exponents']))
+
+    def test_split_findmin_structure(self):
+        random = Random(5)
+
+        for split_order in ('ascending', 'descending', 'random'):
+            elements_number = 300
+            structure = SplitFindminStructureGabow(elements_number, elements_number)
+            costs = [random.randint(1, 1000) for _ in range(elements_number)]
+            elements = [structure.add(item, cost) for item, cost in enumerate(costs)]
+            structure.initialize_head()
+
+            split_positions = list(range(elements_number - 1))
+            if split_order == 'descending':
+                split_positions.reverse()
+            elif split_order == 'random':
+                random.shuffle(split_positions)
+
+            ends = {elements_number - 1}
+            for step, split_position in enumerate(split_positions):
+                decreased = random.randrange(elements_number)
+                costs[decreased] = min(costs[decreased], random.randint(1, 1000))
+                elements[decreased].decrease_cost(costs[decreased])
+                elements[split_position].split()
+                ends.add(split_position)
+
+                if step % 37 == 0:
+                    start = 0
+                    for end in sorted(ends):
+                        for element in elements[start:end + 1]:
+                            self.assertEqual(min(costs[start:end + 1]), element.get_list_cost())
+                        start = end + 1
+
+    def test_vectorized_graph_generator(self):
+        graphs = [VectorizedGraphGenerator.generate_grid_graph(7, 9, 100, 'log_uniform', seed=1),
+                  VectorizedGraphGenerator.generate_geometric_graph(200, 6, 100, seed=1),
+                  VectorizedGraphGenerator.generate_geometric_graph(200, 6, 100, 'unit', seed=1),
+                  VectorizedGraphGenerator.generate_power_law_graph(200, 3, 100, seed=1),
+                  VectorizedGraphGenerator.generate_connected_random_graph(200, 3, 100, seed=1)]
+
+        for graph in graphs:
+            edges = list(graph.get_edges())
+            thorup = ThorupModel(graph)
+            thorup.build()
+
+            self.assertEqual(graph.get_arcs_number() // 2, len(edges))
+            self.assertEqual(len(edges), len({(source, target) for source, target, _ in edges}))
+            self.assertTrue(all(1 <= weight <= 100 for _, _, weight in edges))
+            self.assertNotIn(sys.maxsize, dijkstra(graph, 0))
+            self.assertEqual(dijkstra(graph, 0), thorup.find_shortest_paths(0))
+
+        self.assertEqual(list(graphs[3].weights),
+                         list(VectorizedGraphGenerator.generate_power_law_graph(200, 3, 100, seed=1).weights))
+
+        # the self-loop is dropped and the lightest of the parallel edges kept
+        graph = CsrGraph.from_numpy_edges(3, np.array([0, 1, 1, 2]), np.array([1, 0, 1, 0]), np.array([5, 3, 4, 7]))
+        self.assertEqual([(0, 1, 3), (0, 2, 7)], list(graph.get_edges()))
+
+    def test_graph_loader(self):
+        graph = generate_connected_graph(Random(37), 40, 1000)
+        expected = [dijkstra(graph, source_vertex) for source_vertex in (0, 39)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            dimacs_path, edge_list_path, binary_path = (os.path.join(directory, name)
+                                                        for name in ('graph.gr', 'graph.txt', 'graph.bin'))
+
+            with open(dimacs_path, 'w') as file:
+                file.write('c generated\n  c indented\np sp 40 {}\n'.format(graph.get_arcs_number()))
+                file.writelines('a {} {} {}\n'.format(source + 1, target + 1, weight)
+                                for source in range(40) for target, weight in graph.get_neighbors(source))
+
+            with open(edge_list_path, 'w') as file:
+                file.write('# source target weight\n')
+                file.writelines('{}\t{} {}\n'.format(*edge) for edge in graph.get_edges())
+
+            GraphLoader.write_binary_edges(binary_path, graph)
+
+            for path in (dimacs_path, edge_list_path, binary_path):
+                for chunk_size in (16, 1 << 20):
+                    loaded = GraphLoader.load(path, chunk_size)
+                    self.assertEqual(expected, [dijkstra(loaded, source_vertex) for source_vertex in (0, 39)])
+
+            with open(edge_list_path, 'w') as file:
+                file.write('  # indented comment\n0 1\n\t% 3 4\n \n1 2\n2 0\n')
+
+            self.assertEqual([0, 1, 1], dijkstra(GraphLoader.load_edge_list(edge_list_path), 0))
+
+            # the weight is missing on some lines only
+            with open(edge_list_path, 'w') as file:
+                file.write('0 1 5\n1 2\n2 3\n3 4 7\n')
+
+            loaded = GraphLoader.load_edge_list(edge_list_path)
+            self.assertEqual([(0, 1, 5), (1, 2, 1), (2, 3, 1), (3, 4, 7)], list(loaded.get_edges()))
+
+            for content in ('0 1 5\n1 x 2\n', '0 1\n1 2 3 4\n', '0\n'):
+                with open(edge_list_path, 'w') as file:
+                    file.write(content)
+
+                with self.assertRaises(ValueError):
+                    GraphLoader.load_edge_list(edge_list_path)
+
+            with open(dimacs_path, 'w') as file:
+                file.write('p sp 3 2\na 1 2 4\na 2 3\n')
+
+            with self.assertRaises(ValueError):
+                GraphLoader.load_dimacs(dimacs_path)
+
+    def test_union_find_structure_array(self):
+        union_find_structure = UnionFindStructureArray(6)
+
+        self.assertEqual([0, 1, 3, 4], list(union_find_structure.union_many([0, 1, 0, 3, 4], [1, 2, 2, 4, 5])))
+        roots = union_find_structure.find_many(range(6))
+        self.assertEqual(1, len(set(roots[:3])))
+        self.assertEqual(1, len(set(roots[3:])))
+        self.assertNotEqual(roots[0], roots[3])
+        root = union_find_structure.union(0, 5)
+        self.assertEqual([root] * 6, list(union_find_structure.find_many(range(6))))
+        self.assertEqual(0, len(union_find_structure.union_many([1, 2], [4, 3])))
+
+
+def generate_connected_graph(random: Random, number_of_vertices: int, maximum_edge_weight: int) -> CsrGraph:
+    sources, targets, weights = [], [], []
+
+    for vertex in range(1, number_of_vertices):
+        sources.append(random.randrange(vertex))
+        targets.append(vertex)
+        weights.append(random.randint(1, maximum_edge_weight))
+
+    for _ in range(number_of_vertices):
+        sources.append(random.randrange(number_of_vertices))
+        targets.append(random.randrange(number_of_vertices))
+        weights.append(random.randint(1, maximum_edge_weight))
+
+    return CsrGraph.from_edge_arrays(number_of_vertices, sources, targets, weights)
+
+
+def dijkstra(graph: CsrGraph, source_vertex: int) -> list:
+    d = [sys.maxsize] * graph.vertices_number
+    d[source_vertex] = 0
+    heap = [(0, source_vertex)]
+
+    while heap:
+        distance, vertex = heapq.heappop(heap)
+
+        if distance == d[vertex]:
+            for neighbor, weight in graph.get_neighbors(vertex):
+                if distance + weight < d[neighbor]:
+                    d[neighbor] = distance + weight
+                    heapq.heappush(heap, (d[neighbor], neighbor))
+
+    return d
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
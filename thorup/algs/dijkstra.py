@@ -0,0 +1,88 @@
+import sys
+from heapq import heappop, heappush
+from typing import List
+
+from thorup.algs.mstalgorithm import MstAlgorithm
+from thorup.ds.csrgraph import CsrGraph
+from thorup.ds.radixheap import RadixHeap
+
+
+class DijkstraModel(object):
+    """
+    Dijkstra's single-source shortest paths algorithm with a binary heap or a monotone radix
+    heap, with the interface and the result format of ThorupModel. There is nothing to
+    precompute, which makes it the faster choice for small graphs.
+    """
+
+    def __init__(self, source_graph: CsrGraph, radix_heap: bool = False) -> None:
+        super().__init__()
+
+        if not isinstance(source_graph, CsrGraph):  # pythonds.Graph
+            source_graph = CsrGraph.from_pythonds_graph(source_graph)
+
+        self.source_graph: CsrGraph = source_graph
+        self.vertices_number: int = source_graph.vertices_number
+        self.radix_heap: bool = radix_heap
+
+    def build(self, msb_minimum_spanning_tree_algorithm: MstAlgorithm = None) -> None:
+        """
+        There is nothing to precompute, the parameter only mirrors ThorupModel.build.
+        """
+
+    def find_shortest_paths(self, source_vertex: int) -> List[int]:
+        """
+        :return: the distances from the source vertex, sys.maxsize for unreachable vertices
+        """
+        if source_vertex < 0 or source_vertex >= self.vertices_number:
+            raise AttributeError('{} is no valid source vertex.'.format(str(source_vertex)))
+
+        if self.radix_heap:
+            return self.find_shortest_paths_radix_heap(source_vertex)
+
+        return self.find_shortest_paths_binary_heap(source_vertex)
+
+    def find_shortest_paths_binary_heap(self, source_vertex: int) -> List[int]:
+        offsets, targets, weights = self.source_graph.offsets, self.source_graph.targets, self.source_graph.weights
+        d = [sys.maxsize] * self.vertices_number
+        d[source_vertex] = 0
+        heap = [(0, source_vertex)]
+
+        while heap:
+            distance, vertex = heappop(heap)
+
+            # stale entry of a vertex whose distance has decreased since
+            if distance > d[vertex]:
+                continue
+
+            for arc in range(offsets[vertex], offsets[vertex + 1]):
+                new_distance = distance + weights[arc]
+                target = targets[arc]
+
+                if new_distance < d[target]:
+                    d[target] = new_distance
+                    heappush(heap, (new_distance, target))
+
+        return d
+
+    def find_shortest_paths_radix_heap(self, source_vertex: int) -> List[int]:
+        offsets, targets, weights = self.source_graph.offsets, self.source_graph.targets, self.source_graph.weights
+        d = [sys.maxsize] * self.vertices_number
+        d[source_vertex] = 0
+        heap = RadixHeap()
+        heap.push(0, source_vertex)
+
+        while heap.size:
+            distance, vertex = heap.pop()
+
+            if distance > d[vertex]:
+                continue
+
+            for arc in range(offsets[vertex], offsets[vertex + 1]):
+                new_distance = distance + weights[arc]
+                target = targets[arc]
+
+                if new_distance < d[target]:
+                    d[target] = new_distance
+                    heap.push(new_distance, target)
+
+        return d
@@ -0,0 +1,106 @@
+import sys
+from array import array
+from collections import OrderedDict
+from typing import Dict, List
+
+from thorup.algs.thorup import ThorupModel
+
+DISTANCE_TYPECODE = 'q'
+EVICTION_POLICIES = ('lru', 'lfu')
+
+
+class DistanceCache:
+    """
+    Cache of the full distance rows of a model for recently or frequently used source vertices,
+    whose rows take at most maximum_bytes together.
+
+    The graph is undirected, so d(s, t) = d(t, s), and a point query is answered from the row
+    of either of its vertices. The rows have to be cleared after the weights of the graph have
+    changed, which update_edge_weight does.
+    """
+
+    def __init__(self, model: ThorupModel, maximum_bytes: int, eviction_policy: str = 'lru') -> None:
+        """
+        :param eviction_policy: 'lru' evicts the least recently used row, 'lfu' the least frequently
+        used one, counting the uses of a source vertex also while its row is not cached
+        """
+        super().__init__()
+
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError('{} is no eviction policy.'.format(eviction_policy))
+
+        self.model: ThorupModel = model
+        self.maximum_bytes: int = maximum_bytes
+        self.eviction_policy: str = eviction_policy
+        # the cached rows, from the least to the most recently used
+        self.rows: 'OrderedDict[int, array]' = OrderedDict()
+        self.uses: Dict[int, int] = {}
+        self.used_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def find_shortest_paths(self, source_vertex: int) -> List[int]:
+        return self.get_row(source_vertex).tolist()
+
+    def get_distance(self, source_vertex: int, target_vertex: int) -> int:
+        """
+        :return: the distance between the vertices, sys.maxsize if they are not connected
+        """
+        if source_vertex not in self.rows and target_vertex in self.rows:
+            source_vertex, target_vertex = target_vertex, source_vertex
+
+        if target_vertex < 0 or target_vertex >= self.model.vertices_number:
+            raise AttributeError('{} is no valid target vertex.'.format(str(target_vertex)))
+
+        return self.get_row(source_vertex)[target_vertex]
+
+    def get_row(self, source_vertex: int) -> array:
+        """
+        :return: the distances from the source vertex, which must not be changed
+        """
+        self.uses[source_vertex] = self.uses.get(source_vertex, 0) + 1
+        row = self.rows.get(source_vertex)
+
+        if row is not None:
+            self.hits += 1
+            self.rows.move_to_end(source_vertex)
+            return row
+
+        self.misses += 1
+        row = array(DISTANCE_TYPECODE, self.model.find_shortest_paths(source_vertex))
+        row_bytes = sys.getsizeof(row)
+
+        if row_bytes <= self.maximum_bytes:
+            while self.used_bytes + row_bytes > self.maximum_bytes:
+                self.evict()
+
+            self.rows[source_vertex] = row
+            self.used_bytes += row_bytes
+
+        return row
+
+    def evict(self) -> None:
+        if self.eviction_policy == 'lfu':
+            # the first of the least frequently used rows is the least recently used of them
+            source_vertex = min(self.rows, key=self.uses.__getitem__)
+        else:
+            source_vertex = next(iter(self.rows))
+
+        self.used_bytes -= sys.getsizeof(self.rows.pop(source_vertex))
+        self.evictions += 1
+
+    def clear(self) -> None:
+        self.rows.clear()
+        self.used_bytes = 0
+
+    def update_edge_weight(self, source_vertex: int, target_vertex: int, weight: int) -> None:
+        self.model.update_edge_weight(source_vertex, target_vertex, weight)
+        self.clear()
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {'rows': len(self.rows),
+                'used_bytes': self.used_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions}
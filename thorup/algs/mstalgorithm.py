@@ -1,20 +1,27 @@
+import os
 import sys
 from abc import ABC
+from array import array
+from bisect import bisect_right
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterator, Sequence, Tuple
 
-from pythonds import Graph
-
+from thorup.ds.csrgraph import CsrGraph, VERTEX_TYPECODE, WEIGHT_TYPECODE
 from thorup.ds.edge import Edge
-from thorup.ds.ufstructure import UnionFindNode, UnionFindStructureTarjan
+from thorup.ds.ufstructure import UnionFindStructureArray
+from thorup.util.sharedarrays import Layout, SharedArrays
 
 MAXIMUM_EDGE_WEIGHT = sys.maxsize
 
+_shared_edges: SharedArrays = None
+
 
 class MstAlgorithm(ABC):
     """
     An algorithm for the computation of minimum spanning trees.
     """
     @staticmethod
-    def spawn_tree(source_graph: Graph) -> Graph:
+    def spawn_tree(source_graph: CsrGraph) -> CsrGraph:
         raise NotImplementedError()
 
 
@@ -24,39 +31,207 @@ class KruskalMstAlgorithm(MstAlgorithm):
     """
 
     @staticmethod
-    def spawn_tree(source_graph: Graph) -> Graph:
-        union_find_nodes = [UnionFindNode(i) for i in range(source_graph.numVertices)]
+    def spawn_tree(source_graph: CsrGraph) -> CsrGraph:
+        union_find_structure = UnionFindStructureArray(source_graph.vertices_number)
         sorted_edges = KruskalMstAlgorithm.sorts_edges_by_weights(source_graph)
-        msb_minimum_spanning_tree = Graph()
-
-        while sorted_edges:  # msb_minimum_spanning_tree.numVertices < ((source_graph.numVertices - 1) * 2):
-            edge = sorted_edges.pop(0)
+        sources, targets, weights = [], [], []
 
-            source_id = UnionFindStructureTarjan\
-                .find(union_find_nodes[edge.source]).item
-            target_id = UnionFindStructureTarjan\
-                .find(union_find_nodes[edge.target]).item
+        for edge in sorted_edges:
+            source_id = union_find_structure.find(edge.source)
+            target_id = union_find_structure.find(edge.target)
 
             if source_id != target_id:
-                msb_minimum_spanning_tree.addEdge(source_id, target_id, edge.weight)
-                msb_minimum_spanning_tree.addEdge(target_id, source_id, edge.weight)
-                UnionFindStructureTarjan.union(union_find_nodes[source_id],
-                                               union_find_nodes[target_id])
+                sources.append(edge.source)
+                targets.append(edge.target)
+                weights.append(edge.weight)
+                union_find_structure.union(source_id, target_id)
 
-        return msb_minimum_spanning_tree
+        return CsrGraph.from_edge_arrays(source_graph.vertices_number, sources, targets, weights)
 
     @staticmethod
-    def sorts_edges_by_weights(graph: Graph) -> list:
+    def sorts_edges_by_weights(graph: CsrGraph) -> list:
         buckets = [[] for _ in range(get_most_significant_bit(MAXIMUM_EDGE_WEIGHT))]
 
-        for vertex in graph:
-            for neighbor in vertex.getConnections():
-                if vertex.getId() < neighbor.getId():
-                    buckets[get_most_significant_bit(vertex.getWeight(neighbor))]\
-                        .append(Edge(vertex.getId(), neighbor.getId(), vertex.getWeight(neighbor)))
+        for source, target, weight in graph.get_edges():
+            buckets[get_most_significant_bit(weight)].append(Edge(source, target, weight))
 
         return [edge for bucket in buckets for edge in bucket]
 
 
+class MsbBucketMstAlgorithm(MstAlgorithm):
+    """
+    Kruskal's algorithm on integer edge arrays grouped by the most significant bit of the weights.
+    An msb-minimum spanning tree only needs the groups in increasing order, so the edges are
+    distributed by a counting sort in linear time, and the scan stops once the tree is complete.
+    """
+
+    @staticmethod
+    def spawn_tree(source_graph: CsrGraph) -> CsrGraph:
+        edge_sources, edge_targets, edge_weights = group_edges_by_msb(source_graph)
+        union_find_structure = UnionFindStructureArray(source_graph.vertices_number)
+        tree_edges = union_find_structure.union_many(edge_sources, edge_targets, source_graph.vertices_number - 1)
+
+        return CsrGraph.from_edge_arrays(source_graph.vertices_number,
+                                         [edge_sources[edge] for edge in tree_edges],
+                                         [edge_targets[edge] for edge in tree_edges],
+                                         [edge_weights[edge] for edge in tree_edges])
+
+
+class BoruvkaMstAlgorithm(MstAlgorithm):
+    """
+    Boruvka's algorithm for msb-minimum spanning forests. In every round, each component picks
+    its lightest outgoing edge and all picked edges are added at once, until no component has
+    an outgoing edge left.
+
+    The edges are grouped by the most significant bit of their weights, so an edge is lighter
+    than another if it comes first, which also breaks ties consistently. The edges are scanned
+    in ranges by a pool of worker processes, which attach to the edge arrays and the component
+    of every vertex through shared memory.
+    """
+
+    @staticmethod
+    def spawn_tree(source_graph: CsrGraph, processes: int = None) -> CsrGraph:
+        """
+        :param processes: number of worker processes, os.cpu_count() by default
+        """
+        edge_sources, edge_targets, edge_weights = group_edges_by_msb(source_graph)
+        vertices_number, edges_number = source_graph.vertices_number, len(edge_weights)
+        processes = min(processes or os.cpu_count() or 1, edges_number)
+
+        if processes <= 1:
+            return BoruvkaMstAlgorithm.spawn_tree_in_rounds(
+                source_graph, edge_sources, edge_targets, edge_weights,
+                lambda components: [select_lightest_edges(components, edge_sources, edge_targets, 0, edges_number)])
+
+        shared_arrays = SharedArrays.create({'sources': edge_sources,
+                                             'targets': edge_targets,
+                                             'components': array(VERTEX_TYPECODE, range(vertices_number))})
+        ranges_number = 4 * processes
+        edge_ranges = [(edges_number * i // ranges_number, edges_number * (i + 1) // ranges_number)
+                       for i in range(ranges_number)]
+
+        def select_lightest_edges_shared(components: array) -> Sequence[Dict[int, int]]:
+            shared_arrays['components'][:] = components
+            return pool.map(_select_lightest_edges_shared, edge_ranges)
+
+        try:
+            with Pool(processes, _attach_shared_edges, (shared_arrays.get_name(), shared_arrays.layout)) as pool:
+                return BoruvkaMstAlgorithm.spawn_tree_in_rounds(source_graph, edge_sources, edge_targets,
+                                                                edge_weights, select_lightest_edges_shared)
+        finally:
+            shared_arrays.close()
+            shared_arrays.unlink()
+
+    @staticmethod
+    def spawn_tree_in_rounds(source_graph: CsrGraph,
+                             edge_sources: array,
+                             edge_targets: array,
+                             edge_weights: array,
+                             select: Callable[[array], Sequence[Dict[int, int]]]) -> CsrGraph:
+        """
+        :param select: maps the component of every vertex to the lightest outgoing edges of the
+        components, for consecutive ranges of the edges
+        """
+        union_find_structure = UnionFindStructureArray(source_graph.vertices_number)
+        components = array(VERTEX_TYPECODE, range(source_graph.vertices_number))
+        tree_edges = []
+
+        while True:
+            lightest_edges = {}
+
+            # the earlier ranges hold the lighter edges
+            for range_lightest_edges in select(components):
+                for component, edge in range_lightest_edges.items():
+                    lightest_edges.setdefault(component, edge)
+
+            if not lightest_edges:
+                break
+
+            picked_edges = sorted(set(lightest_edges.values()))
+            united = union_find_structure.union_many([edge_sources[edge] for edge in picked_edges],
+                                                     [edge_targets[edge] for edge in picked_edges])
+            tree_edges.extend(picked_edges[i] for i in united)
+            components = array(VERTEX_TYPECODE, union_find_structure.find_many(range(source_graph.vertices_number)))
+
+        return CsrGraph.from_edge_arrays(source_graph.vertices_number,
+                                         [edge_sources[edge] for edge in tree_edges],
+                                         [edge_targets[edge] for edge in tree_edges],
+                                         [edge_weights[edge] for edge in tree_edges])
+
+
+def select_lightest_edges(components: Sequence[int],
+                          edge_sources: Sequence[int],
+                          edge_targets: Sequence[int],
+                          start: int,
+                          end: int) -> Dict[int, int]:
+    """
+    :return: the first edge from start to end leaving every component that such an edge leaves
+    """
+    lightest_edges = {}
+
+    for edge in range(start, end):
+        source_component, target_component = components[edge_sources[edge]], components[edge_targets[edge]]
+
+        if source_component != target_component:
+            lightest_edges.setdefault(source_component, edge)
+            lightest_edges.setdefault(target_component, edge)
+
+    return lightest_edges
+
+
+def _attach_shared_edges(name: str, layout: Layout) -> None:
+    global _shared_edges
+    _shared_edges = SharedArrays.attach(name, layout)
+
+
+def _select_lightest_edges_shared(edge_range: Tuple[int, int]) -> Dict[int, int]:
+    return select_lightest_edges(_shared_edges['components'], _shared_edges['sources'], _shared_edges['targets'],
+                                 *edge_range)
+
+
 def get_most_significant_bit(x: int) -> int:
     return x.bit_length() - 1
+
+
+def group_edges_by_msb(graph: CsrGraph) -> Tuple[array, array, array]:
+    """
+    Lists every undirected edge of the graph once, grouped by increasing most significant bit
+    of the weight and in graph order within a group (counting sort).
+    :return: sources, targets and weights of the edges
+    """
+    msbs_number = get_most_significant_bit(MAXIMUM_EDGE_WEIGHT) + 1
+    positions = [0] * (msbs_number + 1)
+
+    for _, _, weight in graph.get_edges():
+        positions[weight.bit_length()] += 1
+
+    for msb in range(msbs_number):
+        positions[msb + 1] += positions[msb]
+
+    edges_number = positions[msbs_number]
+    sources = array(VERTEX_TYPECODE, [0]) * edges_number
+    targets = array(VERTEX_TYPECODE, [0]) * edges_number
+    weights = array(WEIGHT_TYPECODE, [0]) * edges_number
+
+    for source, target, weight in graph.get_edges():
+        msb = weight.bit_length() - 1
+        position = positions[msb]
+        sources[position] = source
+        targets[position] = target
+        weights[position] = weight
+        positions[msb] = position + 1
+
+    return sources, targets, weights
+
+
+def get_msb_groups(weights: Sequence[int]) -> Iterator[Tuple[int, int]]:
+    """
+    :return: the start and end positions of the groups of weights with the same most
+    significant bit, for weights grouped as by group_edges_by_msb
+    """
+    start = 0
+
+    while start < len(weights):
+        end = bisect_right(weights, weights[start].bit_length(), start, key=int.bit_length)
+        yield start, end
+        start = end
@@ -1,15 +1,30 @@
+import os
 import sys
-from math import ceil
-from typing import List
-
-from pythonds import Graph
-
-from thorup.algs.mstalgorithm import MstAlgorithm, get_most_significant_bit, MAXIMUM_EDGE_WEIGHT, KruskalMstAlgorithm
-from thorup.ds.componenttree import ComponentTree, ComponentTreeNode
-from thorup.ds.edge import Edge
-from thorup.ds.splitfindmin import SplitFindminStructureGabow
-from thorup.ds.ufstructure import UnionFindNode, UnionFindStructureTarjan
-from thorup.ds.unvisited import UnvisitedDataStructure
+import time
+from array import array
+from multiprocessing import Pool
+from typing import Dict, List, Sequence, Tuple, Type, Union
+
+from thorup.algs.mstalgorithm import MstAlgorithm, get_most_significant_bit, group_edges_by_msb, \
+    get_msb_groups, MsbBucketMstAlgorithm
+from thorup.ds.componenttree import ComponentTree, ComponentTreeQueryState, TREE_ARRAY_NAMES, TREE_TYPECODE, NO_NODE, \
+    compute_delta
+from thorup.ds.csrgraph import CsrGraph
+from thorup.ds.ufstructure import UnionFindStructureArray
+from thorup.ds.unvisited import UnvisitedDataStructure, GabowUnvisitedDataStructure, MinTreeUnvisitedDataStructure
+from thorup.util.indexfile import IndexFile
+from thorup.util.metrics import Metrics
+from thorup.util.sharedarrays import Layout, SharedArrays
+
+MAXIMUM_COMPONENT_HIERARCHY_LEVEL = get_most_significant_bit(sys.maxsize)
+MAXIMUM_SUPPORTED_EDGE_WEIGHT = (1 << MAXIMUM_COMPONENT_HIERARCHY_LEVEL) - 1
+# every distance is at most the weight of the msb-minimum spanning tree, and sys.maxsize stands for unreachable
+MAXIMUM_SUPPORTED_SPANNING_TREE_WEIGHT = sys.maxsize - 1
+# the level j above the root, at which the bucket indexes of all distances below sys.maxsize coincide
+ROOT_PARENT_LEVEL = sys.maxsize.bit_length() + 1
+
+_shared_arrays: SharedArrays = None
+_shared_model: 'ThorupModel' = None
 
 
 class ThorupModel(object):
@@ -18,276 +33,764 @@ class ThorupModel(object):
     algorithm.
     """
 
-    def __init__(self, source_graph: Graph) -> None:
+    def __init__(self,
+                 source_graph: CsrGraph,
+                 unvisited_data_structure_type: Type[UnvisitedDataStructure] = GabowUnvisitedDataStructure) -> None:
+        """
+        :param unvisited_data_structure_type: the backend of the unvisited data structure
+
+        Metrics are collected if enable_metrics is called or the environment variable
+        THORUP_METRICS is set.
+        """
         super().__init__()
-        self.source_vertex: int = None
-        self.source_graph: Graph = source_graph
-        self.visited_vertices: List[bool] = [False] * source_graph.numVertices
-        self.msb_minimum_spanning_tree: Graph = None
+
+        if not isinstance(source_graph, CsrGraph):  # pythonds.Graph
+            source_graph = CsrGraph.from_pythonds_graph(source_graph)
+
+        self.source_graph: CsrGraph = source_graph
+        self.vertices_number: int = source_graph.vertices_number
+        self.msb_minimum_spanning_tree: CsrGraph = None
         self.component_tree: ComponentTree = None
+        self.unvisited_data_structure_type: Type[UnvisitedDataStructure] = unvisited_data_structure_type
         self.unvisited_data_structure: UnvisitedDataStructure = None
+        # the query context of the query methods of the model, created by the first of them
+        self.query: 'ThorupQuery' = None
+        self.metrics: Metrics = Metrics() if Metrics.is_enabled_by_environment() else None
+
+    def enable_metrics(self) -> Metrics:
+        if self.metrics is None:
+            self.metrics = Metrics()
+
+        return self.metrics
+
+    def build(self, msb_minimum_spanning_tree_algorithm: MstAlgorithm = MsbBucketMstAlgorithm) -> None:
+        """
+        Constructs the precomputed structures that are still missing.
+        """
+        if self.msb_minimum_spanning_tree is None:
+            self.construct_minimum_spanning_tree(msb_minimum_spanning_tree_algorithm)
+
+        if self.component_tree is None:
+            self.construct_other_data_structures()
 
     def construct_minimum_spanning_tree(self, msb_minimum_spanning_tree_algorithm: MstAlgorithm) -> None:
-        self.msb_minimum_spanning_tree = msb_minimum_spanning_tree_algorithm.spawn_tree(self.source_graph)
+        """
+        Raises a ValueError if the graph is not connected, has an edge weight beyond
+        MAXIMUM_SUPPORTED_EDGE_WEIGHT or a spanning tree weight beyond
+        MAXIMUM_SUPPORTED_SPANNING_TREE_WEIGHT, for which the component tree would be no valid one.
+        """
+        start = time.perf_counter()
+
+        if self.source_graph.get_arcs_number():
+            maximum_weight = max(self.source_graph.weights)
+
+            if maximum_weight > MAXIMUM_SUPPORTED_EDGE_WEIGHT:
+                raise ValueError('{} is no valid edge weight.'.format(str(maximum_weight)))
+
+        msb_minimum_spanning_tree = msb_minimum_spanning_tree_algorithm.spawn_tree(self.source_graph)
+
+        if msb_minimum_spanning_tree.get_arcs_number() != 2 * max(self.vertices_number - 1, 0):
+            raise ValueError('The graph is not connected.')
+
+        # both arcs of every tree edge are summed
+        check_spanning_tree_weight(sum(msb_minimum_spanning_tree.weights) // 2)
+
+        self.msb_minimum_spanning_tree = msb_minimum_spanning_tree
+
+        if self.metrics is not None:
+            self.metrics.add_phase_seconds('minimum_spanning_tree', time.perf_counter() - start)
 
     def construct_other_data_structures(self) -> None:
+        start = time.perf_counter()
         self.component_tree = self.construct_component_tree()
-        self.unvisited_data_structure = UnvisitedDataStructure(self.source_graph.numVertices,
-                                        self.component_tree)
+        component_tree_end = time.perf_counter()
+        self.unvisited_data_structure = self.unvisited_data_structure_type(self.vertices_number,
+                                                                           self.component_tree)
+
+        if self.metrics is not None:
+            self.metrics.add_phase_seconds('component_tree', component_tree_end - start)
+            self.metrics.add_phase_seconds('unvisited_data_structure', time.perf_counter() - component_tree_end)
 
     def construct_component_tree(self):
         """
         Constructing the component tree (Algorithm G).
         :return: component tree
         """
-        uf = UnionFindStructureTarjan()
-        uf_nodes = [UnionFindNode(i) for i in range(self.source_graph.numVertices)]
-        eis = KruskalMstAlgorithm.sorts_edges_by_weights(self.msb_minimum_spanning_tree)
-
-        c = [0 for _ in range(self.source_graph.numVertices)]
-        s = [0 for _ in range(self.source_graph.numVertices)]
-        component_tree = ComponentTree(self.source_graph.numVertices)
+        return ThorupModel.build_component_tree(self.vertices_number, self.msb_minimum_spanning_tree)
 
-        new_c = [0 for _ in range(self.source_graph.numVertices)]
-        represents_internal_node = [False for _ in range(self.source_graph.numVertices)]
+    @staticmethod
+    def build_component_tree(vertices_number: int, msb_minimum_spanning_tree: CsrGraph) -> ComponentTree:
+        """
+        Algorithm G, level by level: the tree edges of an msb class are united at once, and
+        every component they form becomes an internal node above the components it joins.
+        """
+        uf = UnionFindStructureArray(vertices_number)
+        edge_sources, edge_targets, edge_weights = group_edges_by_msb(msb_minimum_spanning_tree)
 
-        # G.1.
-        for v in range(self.source_graph.numVertices):
-            c[v] = v
-            s[v] = 0
+        nodes_number = max(2 * vertices_number - 1, 0)
+        parents = array(TREE_TYPECODE, [NO_NODE]) * nodes_number
+        levels = array(TREE_TYPECODE, [0]) * nodes_number
+        deltas = array(TREE_TYPECODE, [0]) * nodes_number
+        spanning_tree_weights = array(TREE_TYPECODE, [0]) * nodes_number
+        unvisited_vertices_initial_numbers = (array(TREE_TYPECODE, [1]) * vertices_number +
+                                              array(TREE_TYPECODE, [0]) * (nodes_number - vertices_number))
 
-        # G.2.
-        comp = 0
-        x = set()
+        # G.1. the node of the component of every union-find root
+        c = array(TREE_TYPECODE, range(vertices_number))
+        node = vertices_number - 1
 
         # G.3.
-        for i in range(len(eis) - 1):
-            # G.3.1.
-            ei = eis[i]
-
-            # G.3.2.
-            x.add(uf.find(uf_nodes[ei.source]).item)
-            x.add(uf.find(uf_nodes[ei.target]).item)
+        for start, end in get_msb_groups(edge_weights):
+            level = get_most_significant_bit(edge_weights[start]) + 1
+            sources, targets = edge_sources[start:end], edge_targets[start:end]
 
-            # G.3.3.
-            new_s = s[uf.find(uf_nodes[ei.source]).item] + \
-                    s[uf.find(uf_nodes[ei.target]).item] + \
-                    ei.weight
+            # G.3.1.-G.3.2. the components joined on this level, the first ones of the sources
+            x = uf.find_many(sources + targets)
+            joined = list(dict.fromkeys(x))
 
             # G.3.4.
-            uf.union(uf_nodes[ei.source], uf_nodes[ei.target])
-
-            # G.3.5.
-            s[uf.find(uf_nodes[ei.source]).item] = new_s
-
-            # G.3.6.
-            if get_most_significant_bit(ei.weight) < get_most_significant_bit(eis[i + 1].weight):
-                # G.3.6.1.
-                new_x = set()
-                for v in x:
-                    new_x.add(uf.find(uf_nodes[v]).item)
-
-                # G.3.6.2.
-                for v in new_x:
-                    comp += 1
-                    new_c[v] = comp
-
-                # G.3.6.3.
-                for v in x:
-                    if not represents_internal_node[v]:
-                        component_tree.set_parent_of_leaf(c[v], new_c[uf.find(uf_nodes[v]).item])
-                    else:
-                        component_tree.set_parent_of_internal_node(c[v], new_c[uf.find(uf_nodes[v]).item])
-
-                # G.3.6.4
-                for v in new_x:
-                    c[v] = new_c[v]
-                    represents_internal_node[v] = True
-                    component_tree \
-                        .set_buckets_internal_node_number(c[v], int(ceil(
-                        s[v] / pow(2, get_most_significant_bit(ei.weight)))))
-                    component_tree.set_component_hierarchy_level(c[v],
-                                                                      get_most_significant_bit(ei.weight) + 1)
-                # G.3.6.5
-                x.clear()
-
-        i = len(eis) - 1
-
-        # G.3.1.
-        ei = eis[i]
-
-        # G.3.2.
-        x.add(uf.find(uf_nodes[ei.source]).item)
-        x.add(uf.find(uf_nodes[ei.target]).item)
-
-        # G.3.4.
-        uf.union(uf_nodes[ei.source], uf_nodes[ei.target])
-
-        # G.3.6.
-        if get_most_significant_bit(ei.weight) < get_most_significant_bit(sys.maxsize):
-            # G.3.6.1.
-            new_x = set()
-            for v in x:
-                new_x.add(uf.find(uf_nodes[v]).item)
+            uf.union_many(sources, targets)
+            joined_roots = uf.find_many(joined)
 
             # G.3.6.2.
-            for v in new_x:
-                comp += 1
-                new_c[v] = comp
-
-            # G.3.6.3.
-            for v in x:
-                if not represents_internal_node[v]:
-                    component_tree.set_parent_of_leaf(c[v], new_c[uf.find(uf_nodes[v]).item])
-                else:
-                    component_tree.set_parent_of_internal_node(c[v], new_c[uf.find(uf_nodes[v]).item])
-
-            # G.3.6.4
-            for v in new_x:
-                c[v] = new_c[v]
-                represents_internal_node[v] = True
-                component_tree \
-                    .set_buckets_internal_node_number(c[v], int(ceil(
-                    s[v] / pow(2, get_most_significant_bit(ei.weight)))))
-                component_tree.set_component_hierarchy_level(c[v],
-                                                                  get_most_significant_bit(ei.weight) + 1)
-            # G.3.6.5
-            x.clear()
+            new_c = dict.fromkeys(joined_roots)
+            for root in new_c:
+                node += 1
+                new_c[root] = node
+                levels[node] = level
+
+            # G.3.3. and G.3.6.3.
+            for v, v_root in zip(joined, joined_roots):
+                child, parent = c[v], new_c[v_root]
+                parents[child] = parent
+                spanning_tree_weights[parent] += spanning_tree_weights[child]
+                unvisited_vertices_initial_numbers[parent] += unvisited_vertices_initial_numbers[child]
+
+            for v, weight in zip(x, edge_weights[start:end]):
+                spanning_tree_weights[parents[c[v]]] += weight
+
+            # G.3.6.4.
+            for root, parent in new_c.items():
+                c[root] = parent
+                deltas[parent] = compute_delta(spanning_tree_weights[parent], level)
+
+        component_tree = ComponentTree(vertices_number,
+                                       {'parents': parents,
+                                        'levels': levels,
+                                        'deltas': deltas,
+                                        'spanning_tree_weights': spanning_tree_weights,
+                                        'unvisited_vertices_initial_numbers': unvisited_vertices_initial_numbers,
+                                        'first_children': array(TREE_TYPECODE),
+                                        'children_numbers': array(TREE_TYPECODE),
+                                        'children': array(TREE_TYPECODE),
+                                        # the single leaf is the root of the tree of a single vertex
+                                        'root': array(TREE_TYPECODE, [node])})
+        component_tree.initialize_children()
 
         return component_tree
 
-    def find_shortest_paths(self, source_vertex: int) -> List[int]:
-        if source_vertex < 0 or source_vertex >= self.source_graph.numVertices:
+    def create_query(self) -> 'ThorupQuery':
+        """
+        Builds the precomputed structures that are still missing and creates a query context on
+        them. Queries only read the model, so queries on different contexts can run side by side,
+        in threads or asyncio tasks, while every context runs one query at a time. A context must
+        not be used after update_edge_weight.
+        """
+        self.build()
+        return ThorupQuery(self)
+
+    def get_query(self) -> 'ThorupQuery':
+        """
+        :return: the query context used by the query methods of the model itself
+        """
+        if self.query is None:
+            self.query = self.create_query()
+
+        return self.query
+
+    def find_shortest_paths(self, source_vertex: int, max_distance: int = None) -> Union[List[int], Dict[int, int]]:
+        """
+        Computes the distances from the source vertex to all vertices, see ThorupQuery.
+        """
+        return self.get_query().find_shortest_paths(source_vertex, max_distance)
+
+    def find_shortest_paths_within(self, source_vertex: int, max_distance: int) -> Dict[int, int]:
+        return self.get_query().find_shortest_paths_within(source_vertex, max_distance)
+
+    def find_shortest_path(self, source_vertex: int, target_vertex: int) -> Tuple[int, List[int]]:
+        return self.get_query().find_shortest_path(source_vertex, target_vertex)
+
+    def get_shortest_path(self, target_vertex: int) -> List[int]:
+        return self.get_query().get_shortest_path(target_vertex)
+
+    def find_shortest_paths_many(self, source_vertices: Sequence[int], processes: int = None) -> List[List[int]]:
+        """
+        Computes the distances from each of the source vertices, fanning the sources out across
+        a pool of worker processes. The precomputed structures are built at most once, here, and
+        the workers attach to them through shared memory.
+        :param processes: number of worker processes, os.cpu_count() by default
+        :return: one distance list per source vertex, in the order of the source vertices
+        """
+        for source_vertex in source_vertices:
+            if source_vertex < 0 or source_vertex >= self.vertices_number:
+                raise AttributeError('{} is no valid source vertex.'.format(str(source_vertex)))
+
+        self.build()
+
+        processes = min(processes or os.cpu_count() or 1, len(source_vertices))
+
+        if processes <= 1:
+            return [self.find_shortest_paths(source_vertex) for source_vertex in source_vertices]
+
+        shared_arrays = SharedArrays.create(self.export_arrays())
+
+        try:
+            with Pool(processes, _attach_shared_model,
+                      (shared_arrays.get_name(), shared_arrays.layout, self.unvisited_data_structure_type)) as pool:
+                chunk_size = max(1, len(source_vertices) // (4 * processes))
+                return [distances.tolist() for distances
+                        in pool.map(_find_shortest_paths_shared, source_vertices, chunk_size)]
+        finally:
+            shared_arrays.close()
+            shared_arrays.unlink()
+
+    def export_arrays(self) -> Dict[str, Sequence[int]]:
+        """
+        Flattens the source graph, the msb-minimum spanning tree, the component tree and the
+        mapping of the unvisited data structure into integer arrays.
+        """
+        arrays = {}
+        self.msb_minimum_spanning_tree.compact()
+
+        for prefix, graph in (('graph_', self.source_graph), ('mst_', self.msb_minimum_spanning_tree)):
+            arrays[prefix + 'offsets'] = graph.offsets
+            arrays[prefix + 'targets'] = graph.targets
+            arrays[prefix + 'weights'] = graph.weights
+
+        for name, values in self.component_tree.to_arrays().items():
+            arrays['tree_' + name] = values
+
+        arrays['vertex_index'] = self.unvisited_data_structure.vertex_index
+        arrays['maximum_unvisited_vertex_indexes'] = self.unvisited_data_structure.maximum_unvisited_vertex_indexes
+
+        return arrays
+
+    @staticmethod
+    def from_arrays(arrays: Dict[str, Sequence[int]],
+                    unvisited_data_structure_type: Type[UnvisitedDataStructure] = GabowUnvisitedDataStructure) \
+            -> 'ThorupModel':
+        """
+        Creates a model ready for queries from arrays produced by export_arrays.
+        """
+        vertices_number = len(arrays['graph_offsets']) - 1
+        model = ThorupModel(CsrGraph(vertices_number, arrays['graph_offsets'], arrays['graph_targets'],
+                                     arrays['graph_weights']), unvisited_data_structure_type)
+        model.msb_minimum_spanning_tree = CsrGraph(vertices_number, arrays['mst_offsets'], arrays['mst_targets'],
+                                                   arrays['mst_weights'])
+        model.component_tree = ComponentTree(vertices_number,
+                                             {name: arrays['tree_' + name] for name in TREE_ARRAY_NAMES})
+        model.unvisited_data_structure = unvisited_data_structure_type(vertices_number, model.component_tree,
+                                                                       arrays['vertex_index'],
+                                                                       arrays['maximum_unvisited_vertex_indexes'])
+
+        return model
+
+    def save_index(self, path: str) -> None:
+        """
+        Writes the arrays of export_arrays to an index file, from which load_index creates a
+        model ready for queries.
+        """
+        IndexFile.write(path, self.export_arrays())
+
+    @staticmethod
+    def load_index(path: str,
+                   unvisited_data_structure_type: Type[UnvisitedDataStructure] = GabowUnvisitedDataStructure) \
+            -> 'ThorupModel':
+        """
+        Memory-maps an index file written by save_index. The arrays are used in place and
+        the per-query state is only allocated by the first query.
+        """
+        return ThorupModel.from_arrays(IndexFile.read(path), unvisited_data_structure_type)
+
+    def update_edge_weight(self, source_vertex: int, target_vertex: int, weight: int) -> None:
+        """
+        Sets the weight of the edge between the vertices, of all parallel edges between them,
+        and patches the precomputed structures instead of rebuilding them.
+
+        If the msb class of the weight does not change, the msb-minimum spanning tree stays one,
+        and only the spanning tree weights and deltas of the components containing a changed tree
+        edge are adjusted. So it does if no msb class of an edge outside the tree falls, which
+        changes nothing else. Otherwise the components up to the higher of both msb classes change,
+        so the subtree of the smallest component above them is rebuilt from the msb-minimum
+        spanning tree of its induced subgraph. Raises a ValueError if the weight of the new tree
+        exceeds MAXIMUM_SUPPORTED_SPANNING_TREE_WEIGHT.
+        """
+        if source_vertex < 0 or source_vertex >= self.vertices_number:
             raise AttributeError('{} is no valid source vertex.'.format(str(source_vertex)))
 
-        # B.1.
-        self.source_vertex = source_vertex
-        self.visited_vertices[source_vertex] = True
+        if target_vertex < 0 or target_vertex >= self.vertices_number:
+            raise AttributeError('{} is no valid target vertex.'.format(str(target_vertex)))
 
-        for vertex, weight in self.source_graph.getVertex(source_vertex).connectedTo.items():
-            self.unvisited_data_structure.decreases_super_distance(vertex.getId(), weight)
+        if weight < 1 or weight > MAXIMUM_SUPPORTED_EDGE_WEIGHT:
+            raise ValueError('{} is no valid edge weight.'.format(str(weight)))
 
-        # B.3.
-        self.visit_node(self.component_tree.root)
+        # the query contexts refer to the structures as they are now
+        self.query = None
+        self.detach_arrays()
+        old_weights = self.source_graph.set_edge_weight(source_vertex, target_vertex, weight)
+
+        if not old_weights:
+            raise AttributeError('There is no edge between {} and {}.'.format(str(source_vertex), str(target_vertex)))
+
+        if self.component_tree is None:
+            # built from the current weights later on
+            self.msb_minimum_spanning_tree = None
+            return
+
+        if source_vertex == target_vertex:
+            return
+
+        msb_class = get_most_significant_bit(weight)
+        old_msb_classes = {get_most_significant_bit(old_weight) for old_weight in old_weights}
+
+        if old_msb_classes == {msb_class}:
+            old_tree_weights = self.msb_minimum_spanning_tree.set_edge_weight(source_vertex, target_vertex, weight)
+
+            if old_tree_weights:
+                self.check_updated_spanning_tree_weight(weight - old_tree_weights[0])
+                self.component_tree.add_spanning_tree_weight(
+                    self.component_tree.get_lowest_common_ancestor(source_vertex, target_vertex),
+                    weight - old_tree_weights[0])
+        elif msb_class >= max(old_msb_classes) and \
+                not self.msb_minimum_spanning_tree.has_edge(source_vertex, target_vertex):
+            # an edge outside the tree that only became heavier leaves it an msb-minimum spanning tree
+            return
+        else:
+            self.rebuild_component(source_vertex, max(max(old_msb_classes), msb_class))
+
+    def rebuild_component(self, vertex: int, msb_class: int) -> None:
+        """
+        Rebuilds the msb-minimum spanning tree and the component tree inside the smallest
+        component containing the vertex whose level exceeds the msb class.
+        """
+        component_tree = self.component_tree
+        node = component_tree.parents[vertex]
+
+        while component_tree.levels[node] <= msb_class and component_tree.parents[node] != -1:
+            node = component_tree.parents[node]
+
+        if node == component_tree.root:
+            # grafting the whole tree costs more than building it anew
+            self.msb_minimum_spanning_tree = None
+            self.component_tree = None
+            self.build()
+            return
 
-        # B.4.
-        d = [0] * self.source_graph.numVertices
+        leaves = self.get_leaves(node)
+        minimum_spanning_tree = MsbBucketMstAlgorithm.spawn_tree(self.source_graph.get_induced_subgraph(leaves))
+        old_spanning_tree_weight = component_tree.spanning_tree_weights[node]
+        self.check_updated_spanning_tree_weight(sum(minimum_spanning_tree.weights) // 2 - old_spanning_tree_weight)
 
-        for i in range(self.source_graph.numVertices):
+        component_tree.replace_subtree(node, ThorupModel.build_component_tree(len(leaves), minimum_spanning_tree),
+                                       leaves)
+
+        if component_tree.parents[node] != -1:
+            component_tree.add_spanning_tree_weight(component_tree.parents[node],
+                                                    component_tree.spanning_tree_weights[node] -
+                                                    old_spanning_tree_weight)
+
+        self.msb_minimum_spanning_tree.replace_induced_subgraph(leaves, minimum_spanning_tree)
+        self.unvisited_data_structure.update_mapping(node)
+
+    def check_updated_spanning_tree_weight(self, difference: int) -> None:
+        """
+        Raises a ValueError if the difference takes the spanning tree weight beyond
+        MAXIMUM_SUPPORTED_SPANNING_TREE_WEIGHT. The structures, which do not match the changed
+        graph any more, are dropped then, so that queries raise the ValueError again.
+        """
+        try:
+            check_spanning_tree_weight(self.component_tree.spanning_tree_weights[self.component_tree.root] + difference)
+        except ValueError:
+            self.msb_minimum_spanning_tree = None
+            self.component_tree = None
+            raise
+
+    def get_leaves(self, node: int) -> List[int]:
+        leaves = []
+        stack = [node]
+
+        while stack:
+            current = stack.pop()
+
+            if current < self.vertices_number:
+                leaves.append(current)
+            else:
+                stack.extend(self.component_tree.get_children(current))
+
+        return leaves
+
+    def detach_arrays(self) -> None:
+        """
+        Copies arrays used in place from an index file or shared memory, so that they can be changed.
+        """
+        for graph in (self.source_graph, self.msb_minimum_spanning_tree):
+            if graph is not None:
+                graph.offsets, graph.targets, graph.weights = \
+                    _detach(graph.offsets), _detach(graph.targets), _detach(graph.weights)
+
+        if self.component_tree is not None:
+            for name in TREE_ARRAY_NAMES:
+                if name != 'root':
+                    setattr(self.component_tree, name, _detach(getattr(self.component_tree, name)))
+
+            self.unvisited_data_structure.vertex_index = _detach(self.unvisited_data_structure.vertex_index)
+            self.unvisited_data_structure.maximum_unvisited_vertex_indexes = \
+                _detach(self.unvisited_data_structure.maximum_unvisited_vertex_indexes)
+
+
+class ThorupQuery(object):
+    """
+    A query context on a built ThorupModel, holding the state of one query at a time: the
+    predecessors, the visited vertices and expanded nodes, the buckets and the super distances.
+    The state left by a query is cleaned up by the next one.
+    """
+
+    def __init__(self, model: ThorupModel) -> None:
+        super().__init__()
+        self.model: ThorupModel = model
+        self.source_graph: CsrGraph = model.source_graph
+        self.vertices_number: int = model.vertices_number
+        self.component_tree: ComponentTree = model.component_tree
+        self.source_vertex: int = None
+        self.visited_vertices: List[bool] = [False] * self.vertices_number
+        self.expanded_nodes: List[int] = []
+        # the predecessors of the vertices reached by the last query
+        self.predecessors: Dict[int, int] = {}
+        self.tree_state: ComponentTreeQueryState = ComponentTreeQueryState(model.component_tree)
+        # the structure of the model's backend answers the queries of all vertices; bounded and
+        # point-to-point queries use a min tree, which is reset in time of the vertices they touch,
+        # whereas the lists of a Gabow structure have to be built anew for all vertices
+        self.full_unvisited_data_structure: UnvisitedDataStructure = \
+            model.unvisited_data_structure.create_query_state()
+        self.bounded_unvisited_data_structure: UnvisitedDataStructure = None
+        # the structure used by the last query
+        self.unvisited_data_structure: UnvisitedDataStructure = self.full_unvisited_data_structure
+
+    @property
+    def metrics(self) -> Metrics:
+        return self.model.metrics
+
+    def find_shortest_paths(self, source_vertex: int, max_distance: int = None) -> Union[List[int], Dict[int, int]]:
+        """
+        Computes the distances from the source vertex to all vertices. The context can be
+        queried repeatedly; the state left by the previous query is cleaned up first.
+        :param max_distance: if given, only the vertices within this distance are visited, and
+        their distances are returned as a dictionary from the vertices to their distances
+        """
+        if max_distance is not None:
+            return self.find_shortest_paths_within(source_vertex, max_distance)
+
+        self.search(source_vertex)
+
+        # B.3.
+        d = [0] * self.vertices_number
+
+        for i in range(self.vertices_number):
             d[i] = self.unvisited_data_structure.get_super_distance(i)
 
-        # B.2.
-        d[source_vertex] = 0
+        return d
+
+    def find_shortest_paths_within(self, source_vertex: int, max_distance: int) -> Dict[int, int]:
+        """
+        Skips the buckets whose distances all exceed max_distance, so that only the expanded
+        nodes and the leaves below them are touched.
+        :return: the distances of the vertices within max_distance
+        """
+        self.search(source_vertex, max_distance=max_distance)
+        # no node is expanded in the tree of a single vertex, whose root is the source
+        d = {source_vertex: 0} if source_vertex == self.component_tree.root else {}
+
+        for node in self.expanded_nodes:
+            for child in self.component_tree.get_children(node):
+                if child < self.vertices_number and self.visited_vertices[child]:
+                    distance = self.unvisited_data_structure.get_super_distance(child)
+
+                    if distance <= max_distance:
+                        d[child] = distance
 
         return d
 
-    def expand(self, node: ComponentTreeNode) -> None:
-        node.lowest_bucket_index = self.unvisited_data_structure.get_min_dvi_minus(node) >> (node.component_hierarchy_level -1)
-        node.highest_bucket_index = node.lowest_bucket_index + node.delta
+    def find_shortest_path(self, source_vertex: int, target_vertex: int) -> Tuple[int, List[int]]:
+        """
+        Computes the distance from the source vertex to the target vertex and a shortest path
+        between them, stopping as soon as the target vertex is visited.
+        :return: the distance, sys.maxsize if the target vertex is unreachable, and the vertices
+        of the path from the source vertex to the target vertex, empty if it is unreachable
+        """
+        if target_vertex < 0 or target_vertex >= self.vertices_number:
+            raise AttributeError('{} is no valid target vertex.'.format(str(target_vertex)))
+
+        self.search(source_vertex, target_vertex)
+        distance = self.unvisited_data_structure.get_super_distance(target_vertex)
+
+        if distance == sys.maxsize:
+            return distance, []
+
+        return distance, self.get_shortest_path(target_vertex)
+
+    def get_shortest_path(self, target_vertex: int) -> List[int]:
+        """
+        Follows the predecessors recorded by the last query back from a vertex it has visited.
+        Raises a ValueError if the last query has not visited the vertex, whose distance may
+        then not be final, or has not reached it at all.
+        :return: the vertices of the path from the source vertex to the target vertex
+        """
+        path = [target_vertex]
+
+        if self.source_vertex is None or not self.visited_vertices[target_vertex]:
+            raise ValueError('{} has not been visited by the last query.'.format(str(target_vertex)))
 
-        node.initialize_buckets()
+        while path[-1] != self.source_vertex:
+            predecessor = self.predecessors.get(path[-1], -1)
+
+            if predecessor == -1:
+                raise ValueError('{} has not been reached by the last query.'.format(str(target_vertex)))
+
+            path.append(predecessor)
+
+        path.reverse()
+        return path
+
+    def search(self, source_vertex: int, target_vertex: int = None, max_distance: int = sys.maxsize) -> None:
+        """
+        Visits the vertices in the order of Thorup's algorithm, recording the super distances
+        and the predecessors, until all vertices or the target vertex have been visited. With
+        max_distance, the vertices up to this distance are visited at least.
+        """
+        if source_vertex < 0 or source_vertex >= self.vertices_number:
+            raise AttributeError('{} is no valid source vertex.'.format(str(source_vertex)))
+
+        start = time.perf_counter()
+
+        if self.source_vertex is not None:
+            self.clean_up_between_queries()
+
+        # B.1.
+        self.source_vertex = source_vertex
+        self.predecessors = {}
+
+        if target_vertex is None and max_distance == sys.maxsize:
+            self.unvisited_data_structure = self.full_unvisited_data_structure
+        else:
+            self.unvisited_data_structure = self.get_bounded_unvisited_data_structure()
+
+        self.unvisited_data_structure.metrics = self.metrics
+        self.unvisited_data_structure.initialize_query_state()
+        self.unvisited_data_structure.decreases_super_distance(source_vertex, 0)
+
+        # B.2.
+        self.visit_node(self.component_tree.root, target_vertex, max_distance)
+
+        if self.metrics is not None:
+            self.metrics.add_phase_seconds('query', time.perf_counter() - start)
+            self.metrics.count('find_shortest_paths')
+
+    def get_bounded_unvisited_data_structure(self) -> UnvisitedDataStructure:
+        if self.bounded_unvisited_data_structure is None:
+            if isinstance(self.full_unvisited_data_structure, MinTreeUnvisitedDataStructure):
+                self.bounded_unvisited_data_structure = self.full_unvisited_data_structure
+            else:
+                model_structure = self.model.unvisited_data_structure
+                self.bounded_unvisited_data_structure = MinTreeUnvisitedDataStructure(
+                    self.vertices_number, self.component_tree, model_structure.vertex_index,
+                    model_structure.maximum_unvisited_vertex_indexes)
+
+        return self.bounded_unvisited_data_structure
+
+    def expand(self, node: int) -> None:
+        component_tree, tree_state = self.component_tree, self.tree_state
+        shift = component_tree.levels[node] - 1
+
+        tree_state.initialize_buckets(node, self.unvisited_data_structure.get_min_dvi_minus(node) >> shift)
         self.unvisited_data_structure.delete_root(node)
 
-        for wh in node.children:
+        for wh in component_tree.get_children(node):
             minimum = self.unvisited_data_structure.get_min_dvi_minus(wh)
 
             if minimum != -1:
-                if wh.children or not wh.index == self.source_vertex:
-                    node.inserts_tree_node_to_bucket_by_index(wh, minimum >> (node.component_hierarchy_level - 1))
-                else:
-                    current = node
+                tree_state.inserts_tree_node_to_bucket_by_index(node, wh, minimum >> shift)
 
-                    while current is not None:
-                        current.unvisited_vertices_number -= 1
-                        current = current.parent
+        tree_state.visited[node] = True
+        self.expanded_nodes.append(node)
 
-        node.visited = True
+        if self.metrics is not None:
+            self.metrics.count('expand', component_tree.levels[node])
 
     def visit(self, vertex: int) -> None:
-        if vertex != self.source_vertex:
-            self.visited_vertices[vertex] = True
-            for vrtx, weight in self.source_graph.getVertex(vertex).connectedTo.items():
-                new_d_value = self.unvisited_data_structure.get_super_distance(vertex) + weight
+        self.visited_vertices[vertex] = True
+        targets, weights = self.source_graph.targets, self.source_graph.weights
+        component_tree, tree_state = self.component_tree, self.tree_state
+        d_value = self.unvisited_data_structure.get_super_distance(vertex)
+        metrics = self.metrics
 
-                if new_d_value > 0 and new_d_value < self.unvisited_data_structure.get_super_distance(vrtx.getId()):
-                    wh = self.unvisited_data_structure.get_unvisited_root(self.component_tree, vrtx.getId())
-                    wi = wh.parent
+        if metrics is not None:
+            metrics.count('visit', 0)
+            metrics.count('relax', 0, self.source_graph.get_degree(vertex))
 
-                    old_value = self.unvisited_data_structure.get_min_dvi_minus(wh) >> (wi.index - 1)
-                    self.unvisited_data_structure.decreases_super_distance(vrtx.getId(), new_d_value)
-                    new_value = self.unvisited_data_structure.get_min_dvi_minus(wh) >> (wi.index - 1)
+        for arc in range(self.source_graph.offsets[vertex], self.source_graph.offsets[vertex + 1]):
+            target = targets[arc]
+            new_d_value = d_value + weights[arc]
 
-                    if old_value == -1 or new_value < old_value:
-                        wh.move_to_bucket(wi, self.unvisited_data_structure.get_min_dvi_minus(wh) >> (wi.index - 1))
+            if new_d_value < self.unvisited_data_structure.get_super_distance(target):
+                wh = tree_state.get_unvisited_root(target)
+                wi = component_tree.parents[wh]
+                shift = component_tree.levels[wi] - 1
 
-    def visit_node(self, vi: ComponentTreeNode) -> None:
-        vj = vi.parent
-        j = None
+                old_value = self.unvisited_data_structure.get_min_dvi_minus(wh) >> shift
+                self.unvisited_data_structure.decreases_super_distance(target, new_d_value)
+                self.predecessors[target] = vertex
+                new_value = self.unvisited_data_structure.get_min_dvi_minus(wh) >> shift
 
-        if vj is None:
-            j = get_most_significant_bit(sys.maxsize)
-        else:
-            j = vj.component_hierarchy_level
+                if old_value == -1 or new_value < old_value:
+                    tree_state.move_to_bucket(wh, wi, new_value)
 
-        # F.1.
-        if vi.component_hierarchy_level == 0:
-            # F.1.1.
-            self.visit(vi.index)
+                if metrics is not None and (old_value == -1 or new_value < old_value):
+                    metrics.count('bucket_move', component_tree.levels[wi])
 
-            current = vi.parent
-            while current is not None:
-                current.unvisited_vertices_number -= 1
-                current = current.parent
+    def visit_node(self, vi: int, target_vertex: int = None, max_distance: int = sys.maxsize) -> None:
+        """
+        Visits the node and its subtree as in steps F.1 to F.5. Instead of recursing into the
+        children taken from the buckets, the nodes being visited are kept on an explicit stack
+        together with their parent's level j and the shifted index they were entered with.
+        :param target_vertex: the visit stops right after this leaf has been visited
+        :param max_distance: buckets whose distances all exceed it are not visited
+        """
+        tree_state = self.tree_state
+        parents, levels = self.component_tree.parents, self.component_tree.levels
+        unvisited_vertices_numbers = tree_state.unvisited_vertices_numbers
+        next_bucket_indexes = tree_state.next_bucket_indexes
+        metrics = self.metrics
+        stack = []
+        wh = vi
+
+        while True:
+            if wh is not None:
+                if metrics is not None:
+                    metrics.count('visit_node', levels[wh])
+
+                # F.1.
+                if levels[wh] == 0:
+                    # F.1.1.
+                    self.visit(wh)
+
+                    if wh == target_vertex:
+                        return
+
+                    current = parents[wh]
+                    while current != -1:
+                        unvisited_vertices_numbers[current] -= 1
+                        current = parents[current]
+
+                    # F.1.2.
+                    tree_state.remove_from_parent_bucket(wh)
+                else:
+                    j = ROOT_PARENT_LEVEL if parents[wh] == -1 else levels[parents[wh]]
 
-            # F.1.2.
-            vi.remove_from_parent_bucket()
+                    # F.2.
+                    if not tree_state.visited[wh]:
+                        self.expand(wh)
+                        next_bucket_indexes[wh] = tree_state.bucket_index_offsets[wh]
 
-            # F.1.3.
-            return
+                    stack.append((wh, j, next_bucket_indexes[wh] >> (j - levels[wh])))
 
+                # F.1.3.
+                wh = None
 
-        # F.2
-        if not vi.visited:
-            self.expand(vi)
-            vi.next_bucket_index = vi.lowest_bucket_index
+            if not stack:
+                return
 
-        # F.3
-        old_shifted_index = vi.next_bucket_index >> (j - vi.component_hierarchy_level)
+            vi, j, old_shifted_index = stack[-1]
+            shift = j - levels[vi]
+            # the distances in bucket i of vi are at least i << (levels[vi] - 1)
+            last_bucket_index = max_distance >> (levels[vi] - 1)
 
-        while vi.unvisited_vertices_number > 0 and (vi.next_bucket_index >> (j - vi.component_hierarchy_level)) == old_shifted_index:
-            # F.3.1.
-            while vi.get_bucket(vi.next_bucket_index):
-                # F.3.1.1.
-                wh = vi.get_bucket(vi.next_bucket_index)[0]
+            # F.3.
+            while unvisited_vertices_numbers[vi] > 0 and (next_bucket_indexes[vi] >> shift) == old_shifted_index \
+                    and next_bucket_indexes[vi] <= last_bucket_index:
+                # F.3.1.
+                head = tree_state.get_bucket_head(vi, next_bucket_indexes[vi])
 
+                if head != NO_NODE:
+                    # F.3.1.1.
+                    wh = head
+                    break
+
+                # F.3.2.
+                next_bucket_indexes[vi] += 1
+
+                if metrics is not None:
+                    metrics.count('bucket_scan', levels[vi])
+
+            if wh is not None:
                 # F.3.1.2.
-                self.visit_node(wh)
+                continue
 
-            # F.3.2.
-            vi.next_bucket_index += 1
+            stack.pop()
 
-        # F.4.
-        if vi.unvisited_vertices_number > 0:
-            vi.move_to_bucket(vj, vj.next_bucket_index >> (j - vi.component_hierarchy_level))
-        else:
-            #F.5.
-            if vi.parent is not None:
-                vi.remove_from_parent_bucket()
+            # F.4.
+            if unvisited_vertices_numbers[vi] > 0:
+                # only bounded visits leave the root with unvisited vertices
+                if parents[vi] == -1:
+                    return
+
+                # past max_distance, vi has to leave the current bucket of its parent all the same
+                tree_state.move_to_bucket(vi, parents[vi], max(next_bucket_indexes[vi] >> shift,
+                                                               old_shifted_index + 1))
+
+                if metrics is not None:
+                    metrics.count('bucket_move', levels[parents[vi]])
+            else:
+                # F.5.
+                if parents[vi] != -1:
+                    tree_state.remove_from_parent_bucket(vi)
+
+    def clean_up_between_queries(self) -> None:
+        """
+        Resets the per-query state. Only the nodes expanded by the previous query and their
+        children carry such state, so the tree is not walked as a whole.
+        """
+        for node in self.expanded_nodes:
+            self.tree_state.clean_up(node)
+
+            for child in self.component_tree.get_children(node):
+                if child < self.vertices_number:
+                    self.visited_vertices[child] = False
+
+        self.expanded_nodes = []
+        self.source_vertex = None
+
+
+def check_spanning_tree_weight(spanning_tree_weight: int) -> None:
+    if spanning_tree_weight > MAXIMUM_SUPPORTED_SPANNING_TREE_WEIGHT:
+        raise ValueError('{} is no supported spanning tree weight.'.format(str(spanning_tree_weight)))
+
+
+def _attach_shared_model(name: str,
+                         layout: Layout,
+                         unvisited_data_structure_type: Type[UnvisitedDataStructure]) -> None:
+    global _shared_arrays, _shared_model
+    _shared_arrays = SharedArrays.attach(name, layout)
+    _shared_model = ThorupModel.from_arrays(_shared_arrays.arrays, unvisited_data_structure_type)
 
-    def clean_up_between_queries(self):
-        sf = SplitFindminStructureGabow(self.source_graph.numVertices, self.source_graph.numVertices)
-        self.visited_vertices = []
-        self.deep_clean_up_nodes(self.component_tree.root)
-        self.unvisited_data_structure.containers = []
 
-        for i in range(self.source_graph.numVertices):
-            self.unvisited_data_structure[i] = sf.add(i, float("inf"))
+def _find_shortest_paths_shared(source_vertex: int) -> array:
+    return array('q', _shared_model.find_shortest_paths(source_vertex))
 
-        sf.initialize_head()
 
-    def deep_clean_up_nodes(self, node: ComponentTreeNode) -> None:
-        node.unvisited_vertices_number = node.unvisited_vertices_initial_number
-        node.visited = False
+def _detach(values: Sequence[int]) -> array:
+    if not isinstance(values, memoryview):
+        return values
 
-        for child in node.children:
-            self.deep_clean_up_nodes(child)
+    detached = array(values.format)
+    detached.frombytes(values.cast('B'))
+    return detached
@@ -1,88 +1,304 @@
-from typing import List
+from array import array
+from typing import Dict, List, Sequence
+
+TREE_TYPECODE = 'q'
+NO_NODE = -1
+NO_BUCKET = -1
+TREE_ARRAY_NAMES = ('parents', 'levels', 'deltas', 'spanning_tree_weights', 'unvisited_vertices_initial_numbers',
+                    'first_children', 'children_numbers', 'children', 'root')
 
 
 class ComponentTree:
     """
-    A component tree of a weighted, undirected graph with positive integer edge weights.
+    A component tree of a weighted, undirected graph with positive integer edge weights,
+    stored as a struct of arrays.
+
+    Leaf v has the node id v and the internal node with the number k >= 1 the node id n + k - 1.
+    The children of node u are children[first_children[u]], ...,
+    children[first_children[u] + children_numbers[u] - 1].
+
+    spanning_tree_weights holds the weight of the msb-minimum spanning tree inside the
+    component of every internal node, from which its number of buckets delta follows.
     """
 
-    def __init__(self, vertices_number: int) -> None:
+    def __init__(self, vertices_number: int, arrays: Dict[str, Sequence[int]]) -> None:
+        """
+        :param arrays: the arrays named in TREE_ARRAY_NAMES, as built by build_component_tree or
+        produced by to_arrays of a tree over the same vertices, which are used as they are
+        """
         super().__init__()
-        self.leafs: List[ComponentTreeNode] = [ComponentTreeNode(i) for i in range(vertices_number)]
-        self.internal_nodes: List[ComponentTreeNode] = [None for _ in range(vertices_number)]
-        self.root: ComponentTreeNode = None
+        self.vertices_number: int = vertices_number
+
+        self.parents: Sequence[int] = arrays['parents']
+        self.levels: Sequence[int] = arrays['levels']
+        self.deltas: Sequence[int] = arrays['deltas']
+        self.spanning_tree_weights: Sequence[int] = arrays['spanning_tree_weights']
+        self.unvisited_vertices_initial_numbers: Sequence[int] = arrays['unvisited_vertices_initial_numbers']
+        self.first_children: Sequence[int] = arrays['first_children']
+        self.children_numbers: Sequence[int] = arrays['children_numbers']
+        self.children: Sequence[int] = arrays['children']
+        self.root: int = arrays['root'][0]
+        # internal node ids given up by replace_subtree and children entries no longer referenced
+        self.free_nodes: List[int] = []
+        self.unused_children_number: int = 0
+
+    def get_nodes_number(self) -> int:
+        return len(self.parents)
+
+    def get_children(self, node: int) -> Sequence[int]:
+        return self.children[self.first_children[node]:self.first_children[node] + self.children_numbers[node]]
+
+    def initialize_children(self) -> None:
+        """
+        Completes a tree given by its parents only: drops the internal node ids after the root,
+        which is created last, and lays out the children of every node consecutively, in the
+        order of their node ids.
+        """
+        nodes_number = self.root + 1
+
+        for name in ('parents', 'levels', 'deltas', 'spanning_tree_weights', 'unvisited_vertices_initial_numbers'):
+            setattr(self, name, getattr(self, name)[:nodes_number])
+
+        self.children_numbers = array(TREE_TYPECODE, [0]) * nodes_number
+        self.first_children = array(TREE_TYPECODE, [0]) * nodes_number
+
+        for parent in self.parents:
+            if parent != -1:
+                self.children_numbers[parent] += 1
+
+        self.children = array(TREE_TYPECODE, [0]) * sum(self.children_numbers)
+
+        for node in range(1, nodes_number):
+            self.first_children[node] = self.first_children[node - 1] + self.children_numbers[node - 1]
+
+        positions = self.first_children[:]
+
+        for node, parent in enumerate(self.parents):
+            if parent != -1:
+                self.children[positions[parent]] = node
+                positions[parent] += 1
+
+    def get_internal_descendants(self, node: int) -> List[int]:
+        internal_descendants = []
+        stack = [node]
+
+        while stack:
+            for child in self.get_children(stack.pop()):
+                if child >= self.vertices_number:
+                    internal_descendants.append(child)
+                    stack.append(child)
+
+        return internal_descendants
+
+    def allocate_internal_node(self) -> int:
+        """
+        :return: a free internal node id, appended to the arrays if no id given up before is left
+        """
+        if self.free_nodes:
+            return self.free_nodes.pop()
+
+        for values in (self.levels, self.deltas, self.spanning_tree_weights, self.unvisited_vertices_initial_numbers,
+                       self.first_children, self.children_numbers):
+            values.append(0)
+
+        self.parents.append(-1)
+        return len(self.parents) - 1
+
+    def replace_subtree(self, node: int, subtree: 'ComponentTree', leaves: Sequence[int]) -> None:
+        """
+        Replaces the tree below an internal node by a component tree over the same leaves, whose
+        leaf i is the leaf leaves[i] of this tree. The node keeps its id and parent and takes over
+        the level, delta and spanning tree weight of the root of the subtree. The children lists
+        of the new nodes are appended; the children array is laid out anew once more than half
+        of it is unused.
+        """
+        old_internal_nodes = self.get_internal_descendants(node)
+
+        for old_internal_node in old_internal_nodes + [node]:
+            self.unused_children_number += self.children_numbers[old_internal_node]
+            self.children_numbers[old_internal_node] = 0
+
+        for old_internal_node in old_internal_nodes:
+            self.parents[old_internal_node] = -1
+
+        self.free_nodes.extend(old_internal_nodes)
+
+        node_ids = list(leaves)
+
+        for subtree_node in range(subtree.vertices_number, subtree.get_nodes_number()):
+            node_ids.append(node if subtree_node == subtree.root else self.allocate_internal_node())
+
+        for subtree_node in range(subtree.get_nodes_number()):
+            if subtree_node != subtree.root:
+                self.parents[node_ids[subtree_node]] = node_ids[subtree.parents[subtree_node]]
+
+        for subtree_node in range(subtree.vertices_number, subtree.get_nodes_number()):
+            internal_node = node_ids[subtree_node]
+            self.levels[internal_node] = subtree.levels[subtree_node]
+            self.deltas[internal_node] = subtree.deltas[subtree_node]
+            self.spanning_tree_weights[internal_node] = subtree.spanning_tree_weights[subtree_node]
+            self.unvisited_vertices_initial_numbers[internal_node] = \
+                subtree.unvisited_vertices_initial_numbers[subtree_node]
+            self.first_children[internal_node] = len(self.children)
+            self.children_numbers[internal_node] = subtree.children_numbers[subtree_node]
+            self.children.extend(node_ids[child] for child in subtree.get_children(subtree_node))
 
-    def set_buckets_internal_node_number(self, internal_node_index: int, buckets_number: int) -> None:
-        self.internal_nodes[internal_node_index].delta = buckets_number
+        if 2 * self.unused_children_number > len(self.children):
+            self.compact_children()
 
-    def set_component_hierarchy_level(self, internal_node_index: int, component_hierarchy_level: int):
-        self.internal_nodes[internal_node_index].component_hierarchy_level = component_hierarchy_level
+    def compact_children(self) -> None:
+        """
+        Drops the unused entries of the children array, keeping the order of the children,
+        which the depth-first numbering of the leaves follows.
+        """
+        children = array(TREE_TYPECODE)
 
-    def set_parent_of_leaf(self, leaf: int, parent: int):
-        if not self.internal_nodes[parent]:
-            self.internal_nodes[parent] = ComponentTreeNode(parent)
-            self.root = self.internal_nodes[parent]
+        for node in range(self.get_nodes_number()):
+            first_child = self.first_children[node]
+            self.first_children[node] = len(children)
+            children.extend(self.children[first_child:first_child + self.children_numbers[node]])
 
-        self.leafs[leaf].set_parent(self.internal_nodes[parent])
-        self.internal_nodes[parent].unvisited_vertices_number += 1
-        self.internal_nodes[parent].unvisited_vertices_initial_number += 1
+        self.children = children
+        self.unused_children_number = 0
 
-    def set_parent_of_internal_node(self, internal_node: int, parent: int):
-        if not self.internal_nodes[parent]:
-            self.internal_nodes[parent] = ComponentTreeNode(parent)
-            self.root = self.internal_nodes[parent]
+    def add_spanning_tree_weight(self, node: int, difference: int) -> None:
+        """
+        Adds the difference to the spanning tree weights of the node and its ancestors and
+        recomputes their deltas.
+        """
+        while node != -1:
+            self.spanning_tree_weights[node] += difference
+            self.deltas[node] = compute_delta(self.spanning_tree_weights[node], self.levels[node])
+            node = self.parents[node]
 
-        self.internal_nodes[internal_node].set_parent(self.internal_nodes[parent])
-        self.internal_nodes[parent].unvisited_vertices_number += \
-            self.internal_nodes[internal_node].unvisited_vertices_number
-        self.internal_nodes[parent].unvisited_vertices_initial_number += \
-            self.internal_nodes[internal_node].unvisited_vertices_initial_number
+    def get_lowest_common_ancestor(self, first_node: int, second_node: int) -> int:
+        ancestors = set()
 
+        while first_node != -1:
+            ancestors.add(first_node)
+            first_node = self.parents[first_node]
 
-class ComponentTreeNode:
+        while second_node not in ancestors:
+            second_node = self.parents[second_node]
 
+        return second_node
 
-    def __init__(self, index: int) -> None:
+    def to_arrays(self) -> Dict[str, array]:
+        arrays = {name: getattr(self, name) for name in TREE_ARRAY_NAMES if name != 'root'}
+        arrays['root'] = array(TREE_TYPECODE, [self.root])
+        return arrays
+
+
+class ComponentTreeQueryState:
+    """
+    The state of one query on a component tree: the visited nodes, the numbers of unvisited
+    vertices below them and the buckets of the expanded nodes. The tree itself is not changed
+    by queries, so any number of query states can share it.
+    """
+
+    def __init__(self, component_tree: ComponentTree) -> None:
         super().__init__()
-        self.index: int = index
-        self.delta: int = 0
-        self.lowest_bucket_index: int = 0
-        self.component_hierarchy_level: int = 0
-        self.visited: bool = False
-        self.bucket_index_offset: int = 0
-        self.highest_bucket_index: int = 0
-        self.next_bucket_index: int = 0
-        self.maximum_unvisited_vertex_index: int = 0
-        self.unvisited_vertices_number: int = 0
-        self.unvisited_vertices_initial_number: int = 0
-        self.parent: ComponentTreeNode = None
-
-        self.children: List['ComponentTreeNode'] = []
-        self.buckets: List[List['ComponentTreeNode']] = None
-        self.containing_bucket: List['ComponentTreeNode'] = None
-
-    def remove_from_parent_bucket(self) -> None:
-        self.containing_bucket.remove(self)
-
-    def move_to_bucket(self, parent: 'ComponentTreeNode', index: int) -> None:
-        if self.containing_bucket:
-            self.remove_from_parent_bucket()
-
-        parent.inserts_tree_node_to_bucket_by_index(self, index)
-
-    def inserts_tree_node_to_bucket_by_index(self, tree: 'ComponentTreeNode', index: int) -> None:
-        if index - self.bucket_index_offset < len(self.buckets):
-            self.buckets[index - self.bucket_index_offset].append(tree)
-            tree.containing_bucket = self.buckets[index - self.bucket_index_offset]
-
-    def get_bucket(self, index: int) -> List['ComponentTreeNode']:
-        return self.buckets[index - self.bucket_index_offset]
-
-    def set_parent(self, parent: 'ComponentTreeNode') -> None:
-        self.parent = parent
-        parent.children.append(self)
-
-    def initialize_buckets(self) -> None:
-        self.bucket_index_offset = self.lowest_bucket_index
-        bucket_size = self.highest_bucket_index - self.lowest_bucket_index + 1
-        self.buckets = [[] for _ in range(bucket_size)]
+        nodes_number = component_tree.get_nodes_number()
+        self.component_tree: ComponentTree = component_tree
+        self.visited: bytearray = bytearray(nodes_number)
+        self.unvisited_vertices_numbers: List[int] = list(component_tree.unvisited_vertices_initial_numbers)
+        self.next_bucket_indexes: List[int] = [0] * nodes_number
+        self.bucket_index_offsets: List[int] = [0] * nodes_number
+        # the buckets of an expanded node map the indexes of its non-empty buckets to their first nodes
+        self.buckets: List[Dict[int, int]] = [None] * nodes_number
+        # intrusive doubly linked bucket lists: the bucket index and the neighbors of every node in its bucket
+        self.bucket_indexes: List[int] = [NO_BUCKET] * nodes_number
+        self.next_in_bucket: List[int] = [NO_NODE] * nodes_number
+        self.previous_in_bucket: List[int] = [NO_NODE] * nodes_number
+
+    def clean_up(self, node: int) -> None:
+        """
+        Restores the query state of an expanded node and the bucket pointers of its children.
+        """
+        self.visited[node] = False
+        self.unvisited_vertices_numbers[node] = self.component_tree.unvisited_vertices_initial_numbers[node]
+        self.buckets[node] = None
+
+        for child in self.component_tree.get_children(node):
+            self.bucket_indexes[child] = NO_BUCKET
+
+    def get_unvisited_root(self, leaf: int) -> int:
+        """
+        :return: the unvisited root above the leaf, the highest ancestor whose parent is visited
+        """
+        parents, visited = self.component_tree.parents, self.visited
+        current = leaf
+
+        while not visited[parents[current]]:
+            current = parents[current]
+
+        return current
+
+    def remove_from_parent_bucket(self, node: int) -> None:
+        """
+        Unlinks the node from the bucket of its parent it lies in, if any, in constant time.
+        """
+        index = self.bucket_indexes[node]
+
+        if index == NO_BUCKET:
+            return
+
+        next_node = self.next_in_bucket[node]
+        previous_node = self.previous_in_bucket[node]
+
+        if previous_node != NO_NODE:
+            self.next_in_bucket[previous_node] = next_node
+        elif next_node != NO_NODE:
+            self.buckets[self.component_tree.parents[node]][index] = next_node
+        else:
+            del self.buckets[self.component_tree.parents[node]][index]
+
+        if next_node != NO_NODE:
+            self.previous_in_bucket[next_node] = previous_node
+
+        self.bucket_indexes[node] = NO_BUCKET
+
+    def move_to_bucket(self, node: int, parent: int, index: int) -> None:
+        self.remove_from_parent_bucket(node)
+        self.inserts_tree_node_to_bucket_by_index(parent, node, index)
+
+    def inserts_tree_node_to_bucket_by_index(self, node: int, tree: int, index: int) -> None:
+        """
+        Puts the child tree at the front of the bucket with the index of the node, unless
+        the index lies beyond the last bucket of the node.
+        """
+        if index - self.bucket_index_offsets[node] > self.component_tree.deltas[node]:
+            return
+
+        buckets = self.buckets[node]
+        first_node = buckets.get(index, NO_NODE)
+
+        if first_node != NO_NODE:
+            self.previous_in_bucket[first_node] = tree
+
+        buckets[index] = tree
+        self.bucket_indexes[tree] = index
+        self.next_in_bucket[tree] = first_node
+        self.previous_in_bucket[tree] = NO_NODE
+
+    def get_bucket_head(self, node: int, index: int) -> int:
+        """
+        :return: the first node in the bucket with the index of the node, NO_NODE if it is empty
+        """
+        return self.buckets[node].get(index, NO_NODE)
+
+    def initialize_buckets(self, node: int, lowest_bucket_index: int) -> None:
+        """
+        Makes the buckets lowest_bucket_index, ..., lowest_bucket_index + delta of the node
+        available. Only non-empty buckets are stored.
+        """
+        self.bucket_index_offsets[node] = lowest_bucket_index
+        self.buckets[node] = {}
+
+
+
+def compute_delta(spanning_tree_weight: int, level: int) -> int:
+    """
+    :return: the number of buckets of a component, ceil(spanning_tree_weight / 2^(level - 1))
+    """
+    return -(-spanning_tree_weight >> (level - 1))
@@ -0,0 +1,258 @@
+from array import array
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+VERTEX_TYPECODE = 'i'
+OFFSET_TYPECODE = 'q'
+WEIGHT_TYPECODE = 'q'
+# the patched arcs are compacted once more than 1 / PATCHED_VERTICES_DIVISOR of the vertices are patched
+PATCHED_VERTICES_DIVISOR = 8
+
+
+class CsrGraph:
+    """
+    An undirected graph with positive integer edge weights in compressed sparse row layout.
+
+    The arcs leaving vertex v are stored at positions offsets[v] to offsets[v + 1] - 1 of
+    the contiguous targets and weights arrays. Every undirected edge is stored as two arcs.
+    """
+
+    def __init__(self, vertices_number: int, offsets: array, targets: array, weights: array) -> None:
+        super().__init__()
+        self.vertices_number: int = vertices_number
+        self.offsets: array = offsets
+        self.targets: array = targets
+        self.weights: array = weights
+        # the arcs of the vertices changed by replace_induced_subgraph, which replace their arcs
+        # in the arrays until the next compaction
+        self.patched_arcs: Dict[int, List[Tuple[int, int]]] = {}
+        self.patched_arcs_difference: int = 0
+
+    def get_arcs_number(self) -> int:
+        return len(self.targets) + self.patched_arcs_difference
+
+    def get_degree(self, vertex: int) -> int:
+        if vertex in self.patched_arcs:
+            return len(self.patched_arcs[vertex])
+
+        return self.offsets[vertex + 1] - self.offsets[vertex]
+
+    def get_neighbors(self, vertex: int) -> Iterator[Tuple[int, int]]:
+        if vertex in self.patched_arcs:
+            return iter(self.patched_arcs[vertex])
+
+        first, last = self.offsets[vertex], self.offsets[vertex + 1]
+        return zip(self.targets[first:last], self.weights[first:last])
+
+    def has_edge(self, source: int, target: int) -> bool:
+        return any(neighbor == target for neighbor, _ in self.get_neighbors(source))
+
+    def get_edges(self) -> Iterator[Tuple[int, int, int]]:
+        """
+        Iterates over every undirected edge once, as (source, target, weight) with source < target.
+        """
+        if self.patched_arcs:
+            for source in range(self.vertices_number):
+                for target, weight in self.get_neighbors(source):
+                    if source < target:
+                        yield source, target, weight
+
+            return
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        for source in range(self.vertices_number):
+            for arc in range(offsets[source], offsets[source + 1]):
+                if source < targets[arc]:
+                    yield source, targets[arc], weights[arc]
+
+    def set_edge_weight(self, source: int, target: int, weight: int) -> List[int]:
+        """
+        Sets the weight of the edges between the vertices in both directions.
+        :return: the previous weights of the edges, empty if there is no such edge
+        """
+        old_weights = []
+
+        for first, second in ((source, target), (target, source)):
+            if first in self.patched_arcs:
+                arcs = self.patched_arcs[first]
+
+                for index, (arc_target, arc_weight) in enumerate(arcs):
+                    if arc_target == second:
+                        if first == source:
+                            old_weights.append(arc_weight)
+
+                        arcs[index] = (arc_target, weight)
+            else:
+                for arc in range(self.offsets[first], self.offsets[first + 1]):
+                    if self.targets[arc] == second:
+                        if first == source:
+                            old_weights.append(self.weights[arc])
+
+                        self.weights[arc] = weight
+
+            if source == target:
+                break
+
+        return old_weights
+
+    def get_induced_subgraph(self, vertices: Sequence[int]) -> 'CsrGraph':
+        """
+        :return: the subgraph induced by the vertices, in which vertices[i] has the id i
+        """
+        indexes = {vertex: index for index, vertex in enumerate(vertices)}
+        sources, targets, weights = [], [], []
+
+        for index, vertex in enumerate(vertices):
+            for target, weight in self.get_neighbors(vertex):
+                if target in indexes:
+                    sources.append(index)
+                    targets.append(indexes[target])
+                    weights.append(weight)
+
+        return CsrGraph._from_arcs(len(vertices), sources, targets, weights)
+
+    def replace_induced_subgraph(self, vertices: Sequence[int], subgraph: 'CsrGraph') -> None:
+        """
+        Replaces the edges between the vertices by the edges of the subgraph, whose vertex i is
+        vertices[i], in place. The new arcs of the vertices are kept apart from the arrays until
+        more than a fraction 1 / PATCHED_VERTICES_DIVISOR of all vertices has been patched, so
+        that a replacement costs time in the number of the arcs of the vertices only.
+        """
+        replaced = set(vertices)
+        patched_arcs = {vertex: [(target, weight) for target, weight in self.get_neighbors(vertex)
+                                 if target not in replaced]
+                        for vertex in vertices}
+
+        for source, target, weight in subgraph.get_edges():
+            patched_arcs[vertices[source]].append((vertices[target], weight))
+            patched_arcs[vertices[target]].append((vertices[source], weight))
+
+        for vertex, arcs in patched_arcs.items():
+            self.patched_arcs_difference += len(arcs) - self.get_degree(vertex)
+            self.patched_arcs[vertex] = arcs
+
+        if len(self.patched_arcs) > self.vertices_number // PATCHED_VERTICES_DIVISOR:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Lays the patched arcs out in the arrays. Only the arcs of the patched vertices are
+        written one by one, the arcs of the vertices between them are copied in bulk.
+        """
+        if not self.patched_arcs:
+            return
+
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        new_offsets = array(OFFSET_TYPECODE)
+        new_targets = array(VERTEX_TYPECODE)
+        new_weights = array(WEIGHT_TYPECODE)
+        # the first vertex whose offset has not been copied yet
+        copied = 0
+
+        for vertex in sorted(self.patched_arcs) + [self.vertices_number]:
+            shift = len(new_targets) - offsets[copied]
+            new_offsets.extend(map(shift.__add__, offsets[copied:vertex + 1]))
+            new_targets.extend(targets[offsets[copied]:offsets[vertex]])
+            new_weights.extend(weights[offsets[copied]:offsets[vertex]])
+
+            if vertex == self.vertices_number:
+                break
+
+            for target, weight in self.patched_arcs[vertex]:
+                new_targets.append(target)
+                new_weights.append(weight)
+
+            copied = vertex + 1
+
+        self.offsets, self.targets, self.weights = new_offsets, new_targets, new_weights
+        self.patched_arcs = {}
+        self.patched_arcs_difference = 0
+
+    @staticmethod
+    def from_edge_arrays(vertices_number: int,
+                         sources: Sequence[int],
+                         targets: Sequence[int],
+                         weights: Sequence[int]) -> 'CsrGraph':
+        """
+        Builds a graph from parallel arrays of undirected edges, storing each edge in both directions.
+        """
+        return CsrGraph._from_arcs(vertices_number,
+                                   list(sources) + list(targets),
+                                   list(targets) + list(sources),
+                                   list(weights) + list(weights))
+
+    @staticmethod
+    def from_numpy_edges(vertices_number: int, sources, targets, weights) -> 'CsrGraph':
+        """
+        Builds a graph from NumPy arrays of undirected edges without a Python object per edge,
+        dropping self-loops and keeping the lightest of parallel edges.
+        """
+        # the core does not depend on NumPy, only the callers of this method do
+        import numpy as np
+
+        proper = sources != targets
+        keys = np.minimum(sources, targets)[proper].astype(np.int64) * vertices_number
+        keys += np.maximum(sources, targets)[proper]
+        order = np.argsort(keys)
+        keys = keys[order]
+        group_starts = np.flatnonzero(np.diff(keys, prepend=-1))
+
+        weights = np.minimum.reduceat(weights[proper][order], group_starts) if len(keys) else weights[proper]
+        sources, targets = np.divmod(keys[group_starts], vertices_number)
+
+        arc_sources = np.concatenate((sources, targets))
+        order = np.argsort(arc_sources, kind='stable')
+        offsets = np.zeros(vertices_number + 1, dtype=np.int64)
+        np.cumsum(np.bincount(arc_sources, minlength=vertices_number), out=offsets[1:])
+
+        return CsrGraph(vertices_number,
+                        _to_array(OFFSET_TYPECODE, offsets),
+                        _to_array(VERTEX_TYPECODE, np.concatenate((targets, sources))[order]),
+                        _to_array(WEIGHT_TYPECODE, np.concatenate((weights, weights))[order]))
+
+    @staticmethod
+    def from_pythonds_graph(graph) -> 'CsrGraph':
+        """
+        Import adapter for pythonds graphs whose vertex ids are 0, ..., numVertices - 1.
+        Arcs are copied as they are, so undirected edges must be present in both directions.
+        """
+        sources, targets, weights = [], [], []
+
+        for vertex in graph:
+            for neighbor in vertex.getConnections():
+                sources.append(vertex.getId())
+                targets.append(neighbor.getId())
+                weights.append(vertex.getWeight(neighbor))
+
+        return CsrGraph._from_arcs(graph.numVertices, sources, targets, weights)
+
+    @staticmethod
+    def _from_arcs(vertices_number: int,
+                   sources: Sequence[int],
+                   targets: Sequence[int],
+                   weights: Sequence[int]) -> 'CsrGraph':
+        offsets = array(OFFSET_TYPECODE, [0]) * (vertices_number + 1)
+
+        for source in sources:
+            offsets[source + 1] += 1
+
+        for vertex in range(vertices_number):
+            offsets[vertex + 1] += offsets[vertex]
+
+        positions = offsets[:-1]
+        csr_targets = array(VERTEX_TYPECODE, [0]) * len(targets)
+        csr_weights = array(WEIGHT_TYPECODE, [0]) * len(weights)
+
+        for source, target, weight in zip(sources, targets, weights):
+            position = positions[source]
+            csr_targets[position] = target
+            csr_weights[position] = weight
+            positions[source] = position + 1
+
+        return CsrGraph(vertices_number, offsets, csr_targets, csr_weights)
+
+
+def _to_array(typecode: str, values) -> array:
+    converted = array(typecode)
+    converted.frombytes(values.astype(typecode).tobytes())
+    return converted
@@ -4,15 +4,25 @@ T = TypeVar('T')
 
 
 class DoublyLinkedList(Generic[T]):
+    """
+    The list is its own left sentinel, which saves a container per list.
+    """
+    __slots__ = ('item', 'predecessor', 'successor', 'left_sentinel', 'last_container')
 
     def __init__(self) -> None:
         super().__init__()
-        self.left_sentinel: ElementContainer[T] = ElementContainer(None, None, None)
-        self.last_container: ElementContainer[T] = self.left_sentinel
+        self.item: T = None
+        self.predecessor: ElementContainer[T] = None
+        self.successor: ElementContainer[T] = None
+        self.left_sentinel: DoublyLinkedList[T] = self
+        self.last_container: ElementContainer[T] = self
 
     def __iter__(self) -> Iterator[T]:
         return DoublyLinkedListIterator(self.left_sentinel)
 
+    def insert_after(self, item: T) -> 'ElementContainer[T]':
+        return ElementContainer.insert_after(self, item)
+
     def is_empty(self):
         return self.left_sentinel is self.last_container
 
@@ -80,6 +90,7 @@ class DoublyLinkedList(Generic[T]):
 
 
 class ElementContainer(Generic[T]):
+    __slots__ = ('item', 'predecessor', 'successor')
 
     def __init__(self, item: T, predecessor: 'ElementContainer[T]', successor: 'ElementContainer[T]') -> None:
         super().__init__()
@@ -106,6 +117,8 @@ class ElementContainer(Generic[T]):
 
 
 class DoublyLinkedListIterator:
+    __slots__ = ('current',)
+
     def __init__(self, left_sentinel: ElementContainer[T]):
         self.current = left_sentinel
 
@@ -1,4 +1,5 @@
 class Edge:
+    __slots__ = ('source', 'target', 'weight')
 
     def __init__(self, source: int, target: int, weight=0) -> None:
         super().__init__()
@@ -0,0 +1,50 @@
+import sys
+from typing import List, Tuple
+
+BUCKETS_NUMBER = sys.maxsize.bit_length() + 1
+
+
+class RadixHeap:
+    """
+    Monotone radix heap on non-negative integer keys: no key pushed may be smaller than the
+    last key popped.
+
+    An item lies in the bucket given by the bit length of its key xor the last popped key, so
+    an item only moves to lower buckets and each push and pop costs O(log C) amortized time
+    for keys up to C.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.last_key: int = 0
+        self.size: int = 0
+        self.buckets: List[List[Tuple[int, int]]] = [[] for _ in range(BUCKETS_NUMBER)]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, key: int, value: int) -> None:
+        self.buckets[(key ^ self.last_key).bit_length()].append((key, value))
+        self.size += 1
+
+    def pop(self) -> Tuple[int, int]:
+        """
+        :return: an item with the minimum key
+        """
+        buckets = self.buckets
+
+        if not buckets[0]:
+            index = 1
+
+            while not buckets[index]:
+                index += 1
+
+            bucket = buckets[index]
+            buckets[index] = []
+            self.last_key = last_key = min(bucket)[0]
+
+            for key, value in bucket:
+                buckets[(key ^ last_key).bit_length()].append((key, value))
+
+        self.size -= 1
+        return buckets[0].pop()
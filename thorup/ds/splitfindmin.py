@@ -5,12 +5,17 @@ from thorup.ds.doublylinkedlist import ElementContainer, DoublyLinkedList
 
 T = TypeVar('T')
 
+# shared by all infinite costs instead of a float object per element
+INFINITE_COST = float('inf')
+
 
 class SplitFindminStructureGabow(Generic[T]):
     """
     Implementation of Harold N. Gabow's split-findmin structure, using superelements and sublists.
     TODO remove code duplication
     """
+    __slots__ = ('elements', 'singleton_elements', 'singleton_superelements', 'sublists', 'containing_list',
+                 'ackermann_table', 'containing_container_sublists', 'list_index', 'cost')
 
     def __init__(self,
                  elements_number: int = None,
@@ -25,7 +30,7 @@ class SplitFindminStructureGabow(Generic[T]):
         self.containing_list: SplitFindminStructureGabow = None
         self.ackermann_table: AckermannTable = ackermann_table if ackermann_table else AckermannTable(elements_number)
         self.containing_container_sublists: ElementContainer[SplitFindminStructureGabow[T]] = None
-        self.list_index: int = list_index if list_index \
+        self.list_index: int = list_index if list_index is not None \
             else self.ackermann_table.get_inverse(decreasecosts_number, elements_number)
         self.cost: float = 0
 
@@ -41,7 +46,7 @@ class SplitFindminStructureGabow(Generic[T]):
     def initialize_head(self) -> None:
         current = self.elements.last_container
 
-        self.cost = float("inf")
+        self.cost = INFINITE_COST
         size = 0
 
         while current is not self.elements.left_sentinel:
@@ -53,14 +58,14 @@ class SplitFindminStructureGabow(Generic[T]):
         processed_elements = 0
         superelements_in_current_sublist = 0
         most_recent_superelement = None
+        most_recent_level = None
         current_superelement = None
-        current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
-                                                           list_index=self.list_index - 1)
+        current_level_sublist = None
         while (size - processed_elements) > 3:
             level = self.ackermann_table.get_inverse(self.list_index, size - processed_elements)
 
-            current_superelement = Superelement(level)
-            current_superelement.cost = float("inf")
+            current_superelement = Superelement()
+            current_superelement.cost = INFINITE_COST
 
             number_of_elements = 2 * self.ackermann_table.get_value(self.list_index, level)
 
@@ -73,7 +78,7 @@ class SplitFindminStructureGabow(Generic[T]):
 
             current_superelement.first_containing = current.successor.item
 
-            if most_recent_superelement and most_recent_superelement.level != level:
+            if most_recent_superelement and most_recent_level != level:
                 if superelements_in_current_sublist > 1:
                     container = self.sublists.append_first(current_level_sublist)
                     current_level_sublist.containing_container_sublists = container
@@ -84,19 +89,22 @@ class SplitFindminStructureGabow(Generic[T]):
 
                     most_recent_superelement.containing_list = self
                     most_recent_superelement.sublist_element = None
-                    most_recent_superelement.containing_sublist = None
 
+                current_level_sublist = None
+                superelements_in_current_sublist = 0
+
+            if current_level_sublist is None:
+                # created with its first superelement, as lists of at most three elements have none
                 current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
                                                                    list_index=self.list_index - 1)
-                superelements_in_current_sublist = 0
 
             element = current_level_sublist.add_first(current_superelement, current_superelement.cost)
             current_superelement.sublist_element = element
-            current_superelement.containing_sublist = current_level_sublist
             superelements_in_current_sublist += 1
 
             processed_elements += number_of_elements
             most_recent_superelement = current_superelement
+            most_recent_level = level
 
         if superelements_in_current_sublist > 1:
             container = self.sublists.append_first(current_level_sublist)
@@ -109,7 +117,6 @@ class SplitFindminStructureGabow(Generic[T]):
 
                 most_recent_superelement.containing_list = self
                 most_recent_superelement.sublist_element = None
-                most_recent_superelement.containing_sublist = None
 
         while current is not self.elements.left_sentinel:
             container = self.singleton_elements.append_first(current.item)
@@ -122,7 +129,7 @@ class SplitFindminStructureGabow(Generic[T]):
 
     def initializeTail(self) -> None:
         current = self.elements.left_sentinel.successor
-        self.cost = float("inf")
+        self.cost = INFINITE_COST
         size = 0
 
         while current is not None:
@@ -132,14 +139,14 @@ class SplitFindminStructureGabow(Generic[T]):
             processed_elements = 0
             superelements_in_current_sublist = 0
             most_recent_superelement = None
+            most_recent_level = None
             current_superelement = None
-            current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
-                                                               list_index=self.list_index - 1)
+            current_level_sublist = None
         while (size - processed_elements) > 3:
             level = self.ackermann_table.get_inverse(self.list_index, size - processed_elements)
 
-            current_superelement = Superelement(level)
-            current_superelement.cost = float("inf")
+            current_superelement = Superelement()
+            current_superelement.cost = INFINITE_COST
 
             number_of_elements = 2 * self.ackermann_table.get_value(self.list_index, level)
 
@@ -152,7 +159,7 @@ class SplitFindminStructureGabow(Generic[T]):
 
             current_superelement.last_containing = current.predecessor.item
 
-            if most_recent_superelement and most_recent_superelement.level != level:
+            if most_recent_superelement and most_recent_level != level:
                 if superelements_in_current_sublist > 1:
                     container = self.sublists.append(current_level_sublist)
                     current_level_sublist.containing_container_sublists = container
@@ -163,19 +170,22 @@ class SplitFindminStructureGabow(Generic[T]):
 
                     most_recent_superelement.containing_list = self
                     most_recent_superelement.sublist_element = None
-                    most_recent_superelement.containing_sublist = None
 
+                current_level_sublist = None
+                superelements_in_current_sublist = 0
+
+            if current_level_sublist is None:
+                # created with its first superelement, as lists of at most three elements have none
                 current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
                                                                    list_index=self.list_index - 1)
-                superelements_in_current_sublist = 0
 
             element = current_level_sublist.add(current_superelement, current_superelement.cost)
             current_superelement.sublist_element = element
-            current_superelement.containing_sublist = current_level_sublist
             superelements_in_current_sublist += 1
 
             processed_elements += number_of_elements
             most_recent_superelement = current_superelement
+            most_recent_level = level
 
         if superelements_in_current_sublist > 1:
             container = self.sublists.append(current_level_sublist)
@@ -188,7 +198,6 @@ class SplitFindminStructureGabow(Generic[T]):
 
                 most_recent_superelement.containing_list = self
                 most_recent_superelement.sublist_element = None
-                most_recent_superelement.containing_sublist = None
 
         while current is not self.elements.left_sentinel:
             container = self.singleton_elements.append(current.item)
@@ -217,14 +226,14 @@ class SplitFindminStructureGabow(Generic[T]):
         processed_elements = 0
         superelements_in_current_sublist = 0
         most_recent_superelement = None
+        most_recent_level = None
         current_superelement = None
-        current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
-                                                           list_index=self.list_index - 1)
+        current_level_sublist = None
         while (size - processed_elements) > 3:
             level = self.ackermann_table.get_inverse(self.list_index, size - processed_elements)
 
-            current_superelement = Superelement(level)
-            current_superelement.cost = float("inf")
+            current_superelement = Superelement()
+            current_superelement.cost = INFINITE_COST
 
             number_of_elements = 2 * self.ackermann_table.get_value(self.list_index, level)
 
@@ -237,7 +246,7 @@ class SplitFindminStructureGabow(Generic[T]):
 
             current_superelement.first_containing = current.successor.item
 
-            if most_recent_superelement and most_recent_superelement.level != level:
+            if most_recent_superelement and most_recent_level != level:
                 if superelements_in_current_sublist > 1:
                     container = new_sublists.append_first(current_level_sublist)
                     current_level_sublist.containing_container_sublists = container
@@ -248,19 +257,22 @@ class SplitFindminStructureGabow(Generic[T]):
 
                     most_recent_superelement.containing_list = self
                     most_recent_superelement.sublist_element = None
-                    most_recent_superelement.containing_sublist = None
 
+                current_level_sublist = None
+                superelements_in_current_sublist = 0
+
+            if current_level_sublist is None:
+                # created with its first superelement, as lists of at most three elements have none
                 current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
                                                                    list_index=self.list_index - 1)
-                superelements_in_current_sublist = 0
 
             element = current_level_sublist.add_first(current_superelement, current_superelement.cost)
             current_superelement.sublist_element = element
-            current_superelement.containing_sublist = current_level_sublist
             superelements_in_current_sublist += 1
 
             processed_elements += number_of_elements
             most_recent_superelement = current_superelement
+            most_recent_level = level
 
         if superelements_in_current_sublist > 1:
             container = new_sublists.append_first(current_level_sublist)
@@ -273,9 +285,8 @@ class SplitFindminStructureGabow(Generic[T]):
 
                 most_recent_superelement.containing_list = self
                 most_recent_superelement.sublist_element = None
-                most_recent_superelement.containing_sublist = None
 
-        while current is not first_element_container.predecessorl:
+        while current is not first_element_container.predecessor:
             container = new_singleton_elements.append_first(current.item)
             current.item.containing_container_singleton_elements = container
             current.item.containing_list = self
@@ -303,14 +314,14 @@ class SplitFindminStructureGabow(Generic[T]):
         processed_elements = 0
         superelements_in_current_sublist = 0
         most_recent_superelement = None
+        most_recent_level = None
         current_superelement = None
-        current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
-                                                           list_index=self.list_index - 1)
+        current_level_sublist = None
         while (size - processed_elements) > 3:
             level = self.ackermann_table.get_inverse(self.list_index, size - processed_elements)
 
-            current_superelement = Superelement(level)
-            current_superelement.cost = float("inf")
+            current_superelement = Superelement()
+            current_superelement.cost = INFINITE_COST
 
             number_of_elements = 2 * self.ackermann_table.get_value(self.list_index, level)
 
@@ -323,7 +334,7 @@ class SplitFindminStructureGabow(Generic[T]):
 
             current_superelement.last_containing = current.predecessor.item
 
-            if most_recent_superelement and most_recent_superelement.level != level:
+            if most_recent_superelement and most_recent_level != level:
                 if superelements_in_current_sublist > 1:
                     container = new_sublists.append(current_level_sublist)
                     current_level_sublist.containing_container_sublists = container
@@ -334,19 +345,22 @@ class SplitFindminStructureGabow(Generic[T]):
 
                     most_recent_superelement.containing_list = self
                     most_recent_superelement.sublist_element = None
-                    most_recent_superelement.containing_sublist = None
 
+                current_level_sublist = None
+                superelements_in_current_sublist = 0
+
+            if current_level_sublist is None:
+                # created with its first superelement, as lists of at most three elements have none
                 current_level_sublist = SplitFindminStructureGabow(ackermann_table=self.ackermann_table,
                                                                    list_index=self.list_index - 1)
-                superelements_in_current_sublist = 0
 
             element = current_level_sublist.add(current_superelement, current_superelement.cost)
             current_superelement.sublist_element = element
-            current_superelement.containing_sublist = current_level_sublist
             superelements_in_current_sublist += 1
 
             processed_elements += number_of_elements
             most_recent_superelement = current_superelement
+            most_recent_level = level
 
         if superelements_in_current_sublist > 1:
             container = new_sublists.append(current_level_sublist)
@@ -359,7 +373,6 @@ class SplitFindminStructureGabow(Generic[T]):
 
                 most_recent_superelement.containing_list = self
                 most_recent_superelement.sublist_element = None
-                most_recent_superelement.containing_sublist = None
 
         while current is not last_element_container.successor:
             container = new_singleton_elements.append(current.item)
@@ -387,6 +400,8 @@ class Element(Generic[T]):
     """
     An element of Harold N. Gabow's split-findmin structure.
     """
+    __slots__ = ('cost', 'item', 'superelement', 'containing_list', 'containing_container',
+                 'containing_container_singleton_elements')
 
     def __init__(self, item: T, cost: float) -> None:
         super().__init__()
@@ -400,6 +415,18 @@ class Element(Generic[T]):
     def is_singleton(self) -> bool:
         return self.containing_list or (self.superelement and self.superelement.is_singleton())
 
+    def get_containing_list(self) -> 'SplitFindminStructureGabow[T]':
+        """
+        Finds L(x) like decrease_cost, through the sublists of the lower levels.
+        """
+        if self.containing_list:
+            return self.containing_list
+
+        if self.superelement.is_singleton():
+            return self.superelement.containing_list
+
+        return self.superelement.sublist_element.get_containing_list().containing_list
+
     def decrease_cost(self, new_cost: float) -> 'SplitFindminStructureGabow[T]':
         if self.is_singleton():
             # update c(x)
@@ -445,7 +472,7 @@ class Element(Generic[T]):
                             .cut(se.containing_container_singleton_superelements)
                         break
 
-                    current = current.predecessor
+                    current = get_block_predecessor(current)
 
                 if current is first_structure.elements.left_sentinel:
                     second_structure.singleton_superelements = first_structure.singleton_superelements
@@ -458,18 +485,18 @@ class Element(Generic[T]):
 
                     if se and not se.is_singleton():
                         second_structure.sublists = first_structure.sublists\
-                            .cut(se.containing_sublist.containing_container_sublists)
+                            .cut(se.get_containing_sublist().containing_container_sublists)
                         break
 
-                    current = current.predecessor
+                    current = get_block_predecessor(current)
 
                 if not self.superelement and current == first_structure.elements.left_sentinel:
                         second_structure.sublists = first_structure.sublists
                         first_structure.sublists = DoublyLinkedList()
             else:
                 first_structure = self.superelement.containing_list
-                second_structure = SplitFindminStructureGabow(first_structure.ackermann_table,
-                                                              first_structure.list_index)
+                second_structure = SplitFindminStructureGabow(ackermann_table=first_structure.ackermann_table,
+                                                              list_index=first_structure.list_index)
                 if self is self.superelement.last_containing:
                     current = self.containing_container.predecessor
 
@@ -481,7 +508,7 @@ class Element(Generic[T]):
                                 .cut(element.containing_container_singleton_elements)
                             break
 
-                        current = current.predecessor
+                        current = get_block_predecessor(current)
 
                     if current is first_structure.elements.left_sentinel:
                         second_structure.singleton_elements = first_structure.singleton_elements
@@ -497,10 +524,10 @@ class Element(Generic[T]):
 
                         if se and not se.is_singleton():
                             second_structure.sublists = first_structure.sublists\
-                                .cut(se.containing_sublist.containing_container_sublists)
+                                .cut(se.get_containing_sublist().containing_container_sublists)
                             break
 
-                        current = current.predecessor
+                        current = get_block_predecessor(current)
 
                     if current == first_structure.elements.left_sentinel:
                         second_structure.sublists = first_structure.sublists
@@ -516,7 +543,7 @@ class Element(Generic[T]):
                             last_singleton_element = element.containing_container_singleton_elements
                             break
 
-                        current = current.predecessor
+                        current = get_block_predecessor(current)
 
                     if current == first_structure.elements.left_sentinel:
                         last_singleton_element = first_structure.singleton_elements.left_sentinel
@@ -529,10 +556,10 @@ class Element(Generic[T]):
                         se = current.item.superelement
 
                         if se and not se.is_singleton():
-                            last_sublist = se.containing_sublist.containing_container_sublists
+                            last_sublist = se.get_containing_sublist().containing_container_sublists
                             break
 
-                        current = current.predecessor
+                        current = get_block_predecessor(current)
 
                     if current == first_structure.elements.left_sentinel:
                         last_sublist = first_structure.sublists.left_sentinel
@@ -579,28 +606,23 @@ class Element(Generic[T]):
                     new_sublists.extend(second_structure.sublists)
 
                     second_structure.singleton_elements = new_singleton_elements
-                    second_structure.singletonSuperelements = new_singleton_superelements
+                    second_structure.singleton_superelements = new_singleton_superelements
                     second_structure.sublists = new_sublists
         else:
-            first_structure = self.superelement.containing_sublist.containing_list
-            second_structure = SplitFindminStructureGabow(first_structure.ackermann_table,
-                                                          first_structure.list_index)
-            container_to_insert_after = self.superelement.containing_sublist.containing_container_sublists
-
+            sublist = self.superelement.get_containing_sublist()
+            first_structure = sublist.containing_list
+            second_structure = SplitFindminStructureGabow(ackermann_table=first_structure.ackermann_table,
+                                                          list_index=first_structure.list_index)
+            container_to_insert_after = sublist.containing_container_sublists
+
+            # the superelements find their sublists through their sublist elements, so the
+            # halves of the sublist need no relabeling
             sublist2 = None
             sublist3 = self.superelement.sublist_element.split()
 
-            for element in sublist3.elements:
-                se = element.item
-                se.containing_sublist = sublist3
-
             if self.superelement.sublist_element.containing_container.predecessor.item:
                 sublist2 = self.superelement.sublist_element.containing_container.predecessor.item.split()
 
-                for element in sublist2.elements:
-                    se = element.item
-                    se.containing_sublist = sublist2
-
             if sublist2:
                 container_to_insert_after = first_structure.sublists.insert(container_to_insert_after, sublist2)
                 sublist2.containing_container_sublists = container_to_insert_after
@@ -621,7 +643,7 @@ class Element(Generic[T]):
                             .cut(element.containing_container_singleton_elements)
                         break
 
-                    current = current.predecessor
+                    current = get_block_predecessor(current)
 
                 if current == first_structure.elements.left_sentinel:
                     second_structure.singleton_elements = first_structure.singleton_elements
@@ -637,7 +659,7 @@ class Element(Generic[T]):
                             .cut(se.containing_container_singleton_superelements)
                         break
 
-                    current = current.predecessor
+                    current = get_block_predecessor(current)
 
                 if current is first_structure.elements.left_sentinel:
                     second_structure.singleton_superelements = first_structure.singleton_superelements
@@ -648,7 +670,7 @@ class Element(Generic[T]):
                         .cut(sublist2.containing_container_sublists)
                 else:
                     second_structure.sublists = first_structure.sublists\
-                        .cut(self.superelement.containing_sublist.containing_container_sublists)
+                        .cut(self.superelement.get_containing_sublist().containing_container_sublists)
             else:
                 last_singleton_element = None
                 current = self.containing_container.predecessor
@@ -660,7 +682,7 @@ class Element(Generic[T]):
                         last_singleton_element = element.containing_container_singleton_elements
                         break
 
-                    current = current.predecessor
+                    current = get_block_predecessor(current)
 
                 if current == first_structure.elements.left_sentinel:
                     last_singleton_element = first_structure.singleton_elements.left_sentinel
@@ -674,12 +696,12 @@ class Element(Generic[T]):
                         last_singleton_superelement = se.containing_container_singleton_superelements
                         break
 
-                    current = current.predecessor
+                    current = get_block_predecessor(current)
 
                 if current is first_structure.elements.left_sentinel:
                     last_singleton_superelement = first_structure.singleton_superelements.left_sentinel
 
-                last_sublist = self.superelement.containing_sublist.containing_container_sublists.predecessor
+                last_sublist = self.superelement.get_containing_sublist().containing_container_sublists.predecessor
 
                 new_singleton_elements = DoublyLinkedList()
                 new_singleton_superelements = DoublyLinkedList()
@@ -723,14 +745,14 @@ class Element(Generic[T]):
                 new_sublists.extend(second_structure.sublists)
 
                 second_structure.singleton_elements = new_singleton_elements
-                second_structure.singletonSuperelements = new_singleton_superelements
+                second_structure.singleton_superelements = new_singleton_superelements
                 second_structure.sublists = new_sublists
 
         second_structure.elements = first_structure.elements.cut(self.containing_container)
         second_structure.containing_list = first_structure.containing_list
 
-        first_structure.cost = float("inf")
-        second_structure.cost = float("inf")
+        first_structure.cost = INFINITE_COST
+        second_structure.cost = INFINITE_COST
 
         for element in first_structure.singleton_elements:
             first_structure.cost = min(first_structure.cost, element.cost)
@@ -760,34 +782,59 @@ class Element(Generic[T]):
             if self.containing_list:
                 return self.containing_list.cost
             else:
-                return self.superelement.cost
+                return self.superelement.containing_list.cost
         else:
-            return self.superelement.containing_sublist.get_cost()
+            return self.superelement.get_containing_sublist().get_cost()
 
     def deep_set_pointers(self,
                           sublist: SplitFindminStructureGabow['Superelement[T]'],
                           containing_list: SplitFindminStructureGabow) -> None:
-        sublist.containing_list = containing_list
+        stack = [(sublist, containing_list)]
+
+        while stack:
+            sublist, containing_list = stack.pop()
+            sublist.containing_list = containing_list
 
-        for subsublist in sublist.sublists:
-            self.deep_set_pointers(subsublist, sublist)
+            for subsublist in sublist.sublists:
+                stack.append((subsublist, sublist))
 
 
 class Superelement(Generic[T]):
     """
-    Superelemtn of Harold N. Gabow's split-findmin structure.
+    Superelement of Harold N. Gabow's split-findmin structure.
     """
+    __slots__ = ('first_containing', 'last_containing', 'cost', 'containing_list',
+                 'containing_container_singleton_superelements', 'sublist_element')
 
-    def __init__(self, level: int) -> None:
+    def __init__(self) -> None:
         super().__init__()
-        self.level: int = level
         self.first_containing: 'Element[T]' = None
         self.last_containing: 'Element[T]' = None
         self.cost: float = None
         self.containing_list: List['SplitFindminStructureGabow'] = None
         self.containing_container_singleton_superelements: ElementContainer[Superelement[T]] = None
         self.sublist_element: 'Element'[Superelement[T]] = None
-        self.containing_sublist: 'SplitFindminStructureGabow'[Superelement[T]] = None
 
     def is_singleton(self) -> bool:
         return bool(self.containing_list)
+
+    def get_containing_sublist(self) -> 'SplitFindminStructureGabow[Superelement[T]]':
+        return self.sublist_element.get_containing_list()
+
+
+def get_block_predecessor(container: ElementContainer[Element[T]]) -> ElementContainer[Element[T]]:
+    """
+    Skips the superelement or sublist containing the element of the container, whose
+    elements are all alike to the searches for the nearest left-over, singleton superelement
+    or sublist, so that the searches of a split do not walk element by element.
+    :return: the container before the first element of the superelement or sublist
+    """
+    superelement = container.item.superelement
+
+    if not superelement:
+        return container.predecessor
+
+    if not superelement.is_singleton():
+        superelement = superelement.get_containing_sublist().elements.left_sentinel.successor.item.item
+
+    return superelement.first_containing.containing_container.predecessor
@@ -1,7 +1,10 @@
-from typing import TypeVar, Generic
+from array import array
+from typing import TypeVar, Generic, Iterable, Sequence
 
 T = TypeVar('T')
 
+ELEMENT_TYPECODE = 'q'
+
 class UnionFindStructureTarjan():
     """ Implementation of Tarjan's union-find structure, using
         union with size and find with path compression.
@@ -45,9 +48,98 @@ class UnionFindStructureTarjan():
 
 class UnionFindNode(Generic[T]):
     """  Node of Tarjan's union-find structure. """
+    __slots__ = ('item', 'parent', 'subtree_size')
 
     def __init__(self, item: T, parent: 'UnionFindNode' = None):
         super(UnionFindNode, self).__init__()
         self.item: T = item
         self.parent: UnionFindNode = parent
         self.subtree_size: int = 1
+
+
+class UnionFindStructureArray:
+    """ Union-find structure over the integers 0, ..., n - 1, stored in a parent
+        and a size array, using union by size and find with path halving.
+    """
+
+    def __init__(self, elements_number: int) -> None:
+        super().__init__()
+        self.parents: array = array(ELEMENT_TYPECODE, range(elements_number))
+        self.sizes: array = array(ELEMENT_TYPECODE, [1]) * elements_number
+
+    def find(self, element: int) -> int:
+        parents = self.parents
+
+        while parents[element] != element:
+            parents[element] = parents[parents[element]]
+            element = parents[element]
+
+        return element
+
+    def union(self, first_element: int, second_element: int) -> int:
+        """
+        :return: the root of the united set
+        """
+        first_root = self.find(first_element)
+        second_root = self.find(second_element)
+
+        if first_root != second_root:
+            if self.sizes[first_root] < self.sizes[second_root]:
+                first_root, second_root = second_root, first_root
+
+            self.parents[second_root] = first_root
+            self.sizes[first_root] += self.sizes[second_root]
+
+        return first_root
+
+    def find_many(self, elements: Iterable[int]) -> array:
+        parents = self.parents
+        roots = array(ELEMENT_TYPECODE)
+
+        for element in elements:
+            while parents[element] != element:
+                parents[element] = parents[parents[element]]
+                element = parents[element]
+
+            roots.append(element)
+
+        return roots
+
+    def union_many(self,
+                   first_elements: Sequence[int],
+                   second_elements: Sequence[int],
+                   maximum_unions_number: int = None) -> array:
+        """
+        Unites first_elements[i] and second_elements[i] for i = 0, 1, ... in this order,
+        stopping after maximum_unions_number unions if given.
+        :return: the indexes i for which two different sets were united
+        """
+        parents, sizes = self.parents, self.sizes
+        united = array(ELEMENT_TYPECODE)
+
+        if maximum_unions_number is None:
+            maximum_unions_number = len(first_elements)
+
+        for i in range(len(first_elements)):
+            if len(united) == maximum_unions_number:
+                break
+
+            first_root = first_elements[i]
+            while parents[first_root] != first_root:
+                parents[first_root] = parents[parents[first_root]]
+                first_root = parents[first_root]
+
+            second_root = second_elements[i]
+            while parents[second_root] != second_root:
+                parents[second_root] = parents[parents[second_root]]
+                second_root = parents[second_root]
+
+            if first_root != second_root:
+                if sizes[first_root] < sizes[second_root]:
+                    first_root, second_root = second_root, first_root
+
+                parents[second_root] = first_root
+                sizes[first_root] += sizes[second_root]
+                united.append(i)
+
+        return united
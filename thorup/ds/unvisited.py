@@ -1,65 +1,260 @@
 import sys
-from typing import List
+from abc import ABC
+from array import array
+from typing import List, Sequence
 
-from thorup.ds.componenttree import ComponentTree, ComponentTreeNode
-from thorup.ds.splitfindmin import SplitFindminStructureGabow, Element
+from thorup.ds.componenttree import ComponentTree, TREE_TYPECODE
+from thorup.ds.splitfindmin import SplitFindminStructureGabow, Element, INFINITE_COST
+from thorup.util.metrics import Metrics
 
+INFINITE_SUPER_DISTANCE = sys.maxsize
 
-class UnvisitedDataStructure:
+
+class UnvisitedDataStructure(ABC):
     """
     Unvisited data structure used by Thorup's algorithm
     for maintaining the chaning set of roots of a component tree.
+
+    The leaves are numbered in depth-first order, so the leaves below every node form an
+    interval. The backends maintain the super distances of the leaves in this order and count
+    the decreases and splits they perform into metrics, if it is set.
     """
 
-    def __init__(self, vertices_number: int, component_tree: ComponentTree) -> None:
+    def __init__(self,
+                 vertices_number: int,
+                 component_tree: ComponentTree,
+                 vertex_index: Sequence[int] = None,
+                 maximum_unvisited_vertex_indexes: Sequence[int] = None) -> None:
+        """
+        The mapping computed by an earlier initialize_mapping of the same tree can be passed in
+        as vertex_index and maximum_unvisited_vertex_indexes.
+        """
         super().__init__()
-        self.vertex_index: List[int] = [0 for _ in range(vertices_number)]
+        self.component_tree: ComponentTree = component_tree
+        self.vertex_index: Sequence[int] = vertex_index
+        self.maximum_unvisited_vertex_indexes: Sequence[int] = maximum_unvisited_vertex_indexes
+        self.vertices_number: int = vertices_number
+        self.metrics: Metrics = None
+
+        if vertex_index is None:
+            self.vertex_index = array(TREE_TYPECODE, [0]) * vertices_number
+            self.maximum_unvisited_vertex_indexes = array(TREE_TYPECODE, [0]) * component_tree.get_nodes_number()
+            self.initialize_mapping(component_tree.root, 0)
+
+    def create_query_state(self) -> 'UnvisitedDataStructure':
+        """
+        :return: a structure of the same backend that shares the tree and the mapping with this
+        one, but not the per-query state, so that queries on both do not interfere
+        """
+        return type(self)(self.vertices_number, self.component_tree, self.vertex_index,
+                          self.maximum_unvisited_vertex_indexes)
+
+    def initialize_query_state(self) -> None:
+        """
+        Gives all leaves infinite super distances and makes the root the only unvisited root.
+        Has to be called before every query.
+        """
+        raise NotImplementedError()
+
+    def get_min_dvi_minus(self, node: int) -> int:
+        """
+        :return: the minimum super distance of the leaves below the unvisited root, -1 if it is infinite
+        """
+        raise NotImplementedError()
+
+    def decreases_super_distance(self, vertex_index: int, new_lower_super_distance: int) -> None:
+        raise NotImplementedError()
+
+    def get_super_distance(self, vertex_index: int) -> int:
+        """
+        :return: the super distance of the vertex, sys.maxsize if it is infinite
+        """
+        raise NotImplementedError()
+
+    def delete_root(self, node: int) -> None:
+        """
+        Replaces the expanded unvisited root by its children.
+        """
+        raise NotImplementedError()
+
+    def update_mapping(self, node: int) -> None:
+        """
+        Renumbers the leaves below a node whose subtree has been replaced, within the interval
+        of numbers they had before.
+        """
+        nodes_number = self.component_tree.get_nodes_number()
+
+        if len(self.maximum_unvisited_vertex_indexes) < nodes_number:
+            self.maximum_unvisited_vertex_indexes.extend([0] * (nodes_number - len(self.maximum_unvisited_vertex_indexes)))
+
+        last_node_index = self.maximum_unvisited_vertex_indexes[node]
+        self.initialize_mapping(node, last_node_index - self.component_tree.unvisited_vertices_initial_numbers[node] + 1)
+
+    def initialize_mapping(self, node: int, next_node_index: int) -> int:
+        """
+        Numbers the leaves below the node in depth-first order, starting with next_node_index,
+        and records for every node the number of its last leaf.
+        :return: the number following the last leaf
+        """
+        component_tree = self.component_tree
+        preorder = []
+        stack = [node]
+
+        while stack:
+            current = stack.pop()
+            preorder.append(current)
+
+            if not component_tree.children_numbers[current]:
+                self.vertex_index[current] = next_node_index
+                self.maximum_unvisited_vertex_indexes[current] = next_node_index
+                next_node_index += 1
+            else:
+                stack.extend(reversed(component_tree.get_children(current)))
+
+        for current in reversed(preorder):
+            if component_tree.children_numbers[current]:
+                last_child = component_tree.get_children(current)[-1]
+                self.maximum_unvisited_vertex_indexes[current] = self.maximum_unvisited_vertex_indexes[last_child]
+
+        return next_node_index
+
+
+class GabowUnvisitedDataStructure(UnvisitedDataStructure):
+    """
+    Unvisited data structure on top of Gabow's split-findmin structure, with one list per
+    unvisited root.
+    """
+
+    def __init__(self,
+                 vertices_number: int,
+                 component_tree: ComponentTree,
+                 vertex_index: Sequence[int] = None,
+                 maximum_unvisited_vertex_indexes: Sequence[int] = None) -> None:
+        super().__init__(vertices_number, component_tree, vertex_index, maximum_unvisited_vertex_indexes)
         self.containers: List[Element[int]] = [None for _ in range(vertices_number)]
+        self.split_findmin_structure: SplitFindminStructureGabow[int] = None
 
-        self.initialize_mapping(component_tree.root, 0)
-        self.split_findmin_structure = SplitFindminStructureGabow(vertices_number, vertices_number)
+    def initialize_query_state(self) -> None:
+        """
+        Puts all leaves into a single list with infinite costs, reusing the Ackermann table of
+        the previous split-findmin structure if there is one. The list is rebuilt for every
+        query, as the splits of a query cannot be undone in Gabow's structure.
+        """
+        vertices_number = self.vertices_number
+        ackermann_table = self.split_findmin_structure.ackermann_table if self.split_findmin_structure else None
+        self.split_findmin_structure = SplitFindminStructureGabow(vertices_number, vertices_number, ackermann_table)
 
         for i in range(vertices_number):
-            self.containers[i] = self.split_findmin_structure.add(i, float("inf"))
+            self.containers[i] = self.split_findmin_structure.add(i, INFINITE_COST)
 
         self.split_findmin_structure.initialize_head()
 
-    def get_min_dvi_minus(self, node: ComponentTreeNode) -> int:
-        cost = self.containers[node.maximum_unvisited_vertex_index].get_list_cost()
-        return -1 if cost == float("inf") else cost
+    def get_min_dvi_minus(self, node: int) -> int:
+        cost = self.containers[self.maximum_unvisited_vertex_indexes[node]].get_list_cost()
+        return -1 if cost == INFINITE_COST else cost
 
-    def decreases_super_distance(self, vertex_index: int, new_lower_super_distance) -> None:
+    def decreases_super_distance(self, vertex_index: int, new_lower_super_distance: int) -> None:
         self.containers[self.vertex_index[vertex_index]].decrease_cost(new_lower_super_distance)
 
+        if self.metrics is not None:
+            self.metrics.count('decrease_cost', 0)
+
     def get_super_distance(self, vertex_index: int) -> int:
         cost = self.containers[self.vertex_index[vertex_index]].cost
-        return sys.maxsize if cost == float("inf") else int(cost)
+        return INFINITE_SUPER_DISTANCE if cost == INFINITE_COST else int(cost)
+
+    def delete_root(self, node: int) -> None:
+        children = self.component_tree.get_children(node)
+
+        for child in children[:-1]:
+            self.containers[self.maximum_unvisited_vertex_indexes[child]].split()
+
+        if self.metrics is not None:
+            self.metrics.count('split', self.component_tree.levels[node], len(children) - 1)
+
+
+class MinTreeUnvisitedDataStructure(UnvisitedDataStructure):
+    """
+    Unvisited data structure on top of a flat min tree over the leaves in depth-first order.
+
+    The leaves below an unvisited root are the interval of the root, which follows from the
+    mapping, so splitting a list needs no bookkeeping beyond the visited flags of the
+    component tree. Finding the minimum of a list is a range minimum query in O(log n).
+    """
+
+    def __init__(self,
+                 vertices_number: int,
+                 component_tree: ComponentTree,
+                 vertex_index: Sequence[int] = None,
+                 maximum_unvisited_vertex_indexes: Sequence[int] = None) -> None:
+        super().__init__(vertices_number, component_tree, vertex_index, maximum_unvisited_vertex_indexes)
+        # minimums[vertices_number + i] is the super distance of the leaf with the number i,
+        # minimums[j] the minimum of minimums[2 * j] and minimums[2 * j + 1]
+        self.minimums: List[int] = None
+        # the positions of the leaves given a finite super distance since the last reset
+        self.decreased_positions: List[int] = []
+
+    def initialize_query_state(self) -> None:
+        """
+        Resets only the leaves decreased by the previous query and their ancestors, so that a
+        query touching few vertices does not cost time in the number of all vertices.
+        """
+        if self.minimums is None:
+            self.minimums = [INFINITE_SUPER_DISTANCE] * (2 * self.vertices_number)
+
+        minimums = self.minimums
+
+        for position in self.decreased_positions:
+            # the ancestors above an infinite minimum have been reset by an earlier leaf
+            while position and minimums[position] != INFINITE_SUPER_DISTANCE:
+                minimums[position] = INFINITE_SUPER_DISTANCE
+                position >>= 1
 
-    def get_unvisited_root(self, component_tree: ComponentTree, leaf_index: int) -> ComponentTreeNode:
-        current = component_tree.leafs[leaf_index]
+        self.decreased_positions = []
 
-        while not current.parent.visited:
-            current = current.parent
+    def get_min_dvi_minus(self, node: int) -> int:
+        minimums = self.minimums
+        last = self.maximum_unvisited_vertex_indexes[node] + 1
+        first = last - self.component_tree.unvisited_vertices_initial_numbers[node] + self.vertices_number
+        last += self.vertices_number
+        minimum = INFINITE_SUPER_DISTANCE
 
-        return current
+        while first < last:
+            if first & 1:
+                if minimums[first] < minimum:
+                    minimum = minimums[first]
+                first += 1
 
-    def delete_root(self, node: ComponentTreeNode) -> None:
-        for child in node.children:
-            if child is not node.children[-1]:
-                self.containers[child.maximum_unvisited_vertex_index].split()
+            if last & 1:
+                last -= 1
+                if minimums[last] < minimum:
+                    minimum = minimums[last]
 
-    def initialize_mapping(self, node: ComponentTreeNode, next_node_index: int) -> int:
-        if not node.children:
-            self.vertex_index[node.index] = next_node_index
-            node.maximum_unvisited_vertex_index = next_node_index
-            return next_node_index + 1
+            first >>= 1
+            last >>= 1
 
-        else:
-            next_index = next_node_index
+        return -1 if minimum == INFINITE_SUPER_DISTANCE else minimum
 
-            for child in node.children:
-                next_index = self.initialize_mapping(child, next_index)
+    def decreases_super_distance(self, vertex_index: int, new_lower_super_distance: int) -> None:
+        minimums = self.minimums
+        position = self.vertex_index[vertex_index] + self.vertices_number
 
-            node.maximum_unvisited_vertex_index = next_index - 1
+        if minimums[position] == INFINITE_SUPER_DISTANCE:
+            self.decreased_positions.append(position)
+
+        minimums[position] = new_lower_super_distance
+        position >>= 1
+
+        # super distances only decrease, so the update stops at the first smaller minimum
+        while position and minimums[position] > new_lower_super_distance:
+            minimums[position] = new_lower_super_distance
+            position >>= 1
+
+        if self.metrics is not None:
+            self.metrics.count('decrease_cost', 0)
+
+    def get_super_distance(self, vertex_index: int) -> int:
+        return self.minimums[self.vertex_index[vertex_index] + self.vertices_number]
 
-            return next_index
+    def delete_root(self, node: int) -> None:
+        pass
@@ -1,6 +1,6 @@
 from random import choices, randrange
 
-from pythonds import Graph
+from thorup.ds.csrgraph import CsrGraph
 
 
 class RandomGraphGenerator(object):
@@ -8,14 +8,52 @@ class RandomGraphGenerator(object):
     @staticmethod
     def generate_connected_weighted_undirected_graph(number_of_vertices: int,
                                                      maximum_edge_weight: int,
-                                                     edges_per_vertex: int):
-        graph = Graph()
+                                                     edges_per_vertex: int) -> CsrGraph:
+        sources, targets, weights = [], [], []
 
         indexes = [index for index in range(number_of_vertices)]
 
         for index in indexes:
+            # an edge to an earlier vertex keeps the graph connected
+            if index:
+                sources.append(index)
+                targets.append(randrange(index))
+                weights.append(randrange(1, maximum_edge_weight))
+
             for neighbor_vertex_index in choices(indexes, k=randrange(1, min(number_of_vertices, edges_per_vertex))):
-                graph.addEdge(index, neighbor_vertex_index, randrange(1, maximum_edge_weight))
-                graph.addEdge(neighbor_vertex_index, index, randrange(1, maximum_edge_weight))
+                sources.append(index)
+                targets.append(neighbor_vertex_index)
+                weights.append(randrange(1, maximum_edge_weight))
+
+        return CsrGraph.from_edge_arrays(number_of_vertices, sources, targets, weights)
+
+    @staticmethod
+    def generate_grid_graph(rows: int, columns: int, maximum_edge_weight: int) -> CsrGraph:
+        """
+        The vertex row * columns + column is connected to its right and lower neighbor.
+        """
+        sources, targets, weights = [], [], []
+
+        for row in range(rows):
+            for column in range(columns):
+                vertex = row * columns + column
+
+                if column + 1 < columns:
+                    sources.append(vertex)
+                    targets.append(vertex + 1)
+                    weights.append(randrange(1, maximum_edge_weight))
+
+                if row + 1 < rows:
+                    sources.append(vertex)
+                    targets.append(vertex + columns)
+                    weights.append(randrange(1, maximum_edge_weight))
+
+        return CsrGraph.from_edge_arrays(rows * columns, sources, targets, weights)
+
+    @staticmethod
+    def generate_path_graph(number_of_vertices: int, maximum_edge_weight: int) -> CsrGraph:
+        sources = range(number_of_vertices - 1)
+        targets = range(1, number_of_vertices)
+        weights = [randrange(1, maximum_edge_weight) for _ in sources]
 
-        return graph
+        return CsrGraph.from_edge_arrays(number_of_vertices, sources, targets, weights)
@@ -0,0 +1,267 @@
+import mmap
+import struct
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from thorup.ds.csrgraph import CsrGraph
+
+DEFAULT_CHUNK_SIZE = 1 << 24
+
+BINARY_EDGES_MAGIC = b'THORUPED'
+BINARY_EDGES_VERSION = 1
+# magic, version, number of vertices, number of edges
+BINARY_EDGES_HEADER_FORMAT = '<8sIxxxxQQ'
+BINARY_EDGE_DTYPE = np.dtype([('source', '<i4'), ('target', '<i4'), ('weight', '<i8')])
+
+SPACE, NEWLINE = ord(' '), ord('\n')
+
+
+class GraphLoader:
+    """
+    Bulk loader of graph files, which parses memory-mapped files chunk by chunk into NumPy
+    arrays and builds the CSR graph from them, without a Python object per edge.
+
+    Edges are undirected: arcs given in both directions, parallel edges and self-loops are
+    merged as in CsrGraph.from_numpy_edges.
+    """
+
+    @staticmethod
+    def load(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> CsrGraph:
+        """
+        Loads a binary edge file, recognized by its magic, a DIMACS file ending with .gr or
+        otherwise an edge list.
+        """
+        with open(path, 'rb') as file:
+            magic = file.read(len(BINARY_EDGES_MAGIC))
+
+        if magic == BINARY_EDGES_MAGIC:
+            return GraphLoader.load_binary_edges(path)
+
+        if path.endswith('.gr'):
+            return GraphLoader.load_dimacs(path, chunk_size)
+
+        return GraphLoader.load_edge_list(path, chunk_size=chunk_size)
+
+    @staticmethod
+    def load_dimacs(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> CsrGraph:
+        """
+        Loads a graph in the DIMACS shortest path format, whose problem line 'p sp n m' gives
+        the number of vertices and whose arc lines 'a u v w' use the vertex ids 1, ..., n.
+        """
+        vertices_number = None
+        edges = []
+
+        for chunk in _read_chunks(path, chunk_size):
+            line_starts = _get_line_starts(chunk)
+            first_bytes = _get_first_bytes(chunk, line_starts)
+
+            for line_start in line_starts[first_bytes == ord('p')]:
+                vertices_number = _parse_problem_line(path, chunk, line_start)
+
+            _blank_lines(chunk, line_starts, first_bytes != ord('a'))
+            chunk[chunk == ord('a')] = SPACE
+            edges.append(_parse_edges(path, chunk, line_starts, (3,)))
+
+        if vertices_number is None:
+            raise ValueError('{} has no problem line.'.format(path))
+
+        sources, targets, weights = _concatenate(edges)
+        return _build(path, vertices_number, sources - 1, targets - 1, weights)
+
+    @staticmethod
+    def load_edge_list(path: str, vertices_number: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> CsrGraph:
+        """
+        Loads lines 'u v' or 'u v w' separated by whitespace, with the vertex ids 0, ..., n - 1
+        and the weight 1 if it is missing, which may differ from line to line. Lines starting with
+        # or %, after any leading whitespace, are comments.
+        :param vertices_number: the largest vertex id plus one by default
+        """
+        edges = []
+
+        for chunk in _read_chunks(path, chunk_size):
+            line_starts = _get_line_starts(chunk)
+            first_bytes = _get_first_bytes(chunk, line_starts)
+            _blank_lines(chunk, line_starts, (first_bytes == ord('#')) | (first_bytes == ord('%')))
+            edges.append(_parse_edges(path, chunk, line_starts, (2, 3)))
+
+        sources, targets, weights = _concatenate(edges)
+
+        if vertices_number is None:
+            vertices_number = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+
+        return _build(path, vertices_number, sources, targets, weights)
+
+    @staticmethod
+    def load_binary_edges(path: str) -> CsrGraph:
+        """
+        Loads a file written by write_binary_edges, whose edge records are used in place
+        through a memory map.
+        """
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_size = struct.calcsize(BINARY_EDGES_HEADER_FORMAT)
+
+        if len(buffer) < header_size:
+            raise ValueError('{} is no binary edge file.'.format(path))
+
+        magic, version, vertices_number, edges_number = struct.unpack_from(BINARY_EDGES_HEADER_FORMAT, buffer)
+
+        if magic != BINARY_EDGES_MAGIC:
+            raise ValueError('{} is no binary edge file.'.format(path))
+
+        if version != BINARY_EDGES_VERSION:
+            raise ValueError('{} has version {}, expected {}.'.format(path, version, BINARY_EDGES_VERSION))
+
+        if len(buffer) != header_size + edges_number * BINARY_EDGE_DTYPE.itemsize:
+            raise ValueError('{} is truncated.'.format(path))
+
+        edges = np.frombuffer(buffer, BINARY_EDGE_DTYPE, edges_number, header_size)
+        return _build(path, vertices_number, edges['source'], edges['target'], edges['weight'])
+
+    @staticmethod
+    def write_binary_edges(path: str, graph: CsrGraph, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        """
+        Writes every undirected edge of the graph once, as little-endian records of the
+        source, target and weight after a fixed header.
+        """
+        offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+        targets = np.frombuffer(graph.targets, dtype=np.int32)
+        weights = np.frombuffer(graph.weights, dtype=np.int64)
+        sources = np.repeat(np.arange(graph.vertices_number, dtype=np.int32), np.diff(offsets))
+        forward = np.flatnonzero(sources < targets)
+
+        with open(path, 'wb') as file:
+            file.write(struct.pack(BINARY_EDGES_HEADER_FORMAT, BINARY_EDGES_MAGIC, BINARY_EDGES_VERSION,
+                                   graph.vertices_number, len(forward)))
+
+            records_number = max(1, chunk_size // BINARY_EDGE_DTYPE.itemsize)
+
+            for start in range(0, len(forward), records_number):
+                arcs = forward[start:start + records_number]
+                records = np.empty(len(arcs), dtype=BINARY_EDGE_DTYPE)
+                records['source'], records['target'], records['weight'] = sources[arcs], targets[arcs], weights[arcs]
+                file.write(records.tobytes())
+
+
+def _read_chunks(path: str, chunk_size: int) -> Iterator[np.ndarray]:
+    """
+    :return: writable copies of consecutive pieces of the memory-mapped file, each ending
+    with a complete line
+    """
+    with open(path, 'rb') as file:
+        if not file.seek(0, 2):
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            start = 0
+
+            while start < len(buffer):
+                end = buffer.find(b'\n', min(start + chunk_size, len(buffer)) - 1) + 1 or len(buffer)
+                chunk = np.empty(end - start + 1, dtype=np.uint8)
+                chunk[:-1] = np.frombuffer(buffer, np.uint8, end - start, start)
+                # a trailing newline terminates the last line
+                chunk[-1] = NEWLINE
+                yield chunk
+                start = end
+
+
+def _get_line_starts(chunk: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.flatnonzero(chunk[:-1] == NEWLINE) + 1))
+
+
+def _get_first_bytes(chunk: np.ndarray, line_starts: np.ndarray) -> np.ndarray:
+    """
+    :return: the first byte of every line after its leading whitespace, a space for blank lines
+    """
+    non_blank_positions = np.append(np.flatnonzero(chunk > SPACE), len(chunk))
+    # the position of the first non-whitespace byte at or after every line start
+    first_positions = non_blank_positions[np.searchsorted(non_blank_positions, line_starts)]
+    blank = first_positions >= np.append(line_starts[1:], len(chunk))
+    first_bytes = chunk[np.where(blank, 0, first_positions)]
+    first_bytes[blank] = SPACE
+    return first_bytes
+
+
+def _blank_lines(chunk: np.ndarray, line_starts: np.ndarray, blanked: np.ndarray) -> None:
+    """
+    Overwrites the lines of the chunk selected by blanked with spaces.
+    """
+    line_ends = np.append(line_starts[1:], len(chunk))
+    changes = np.zeros(len(chunk) + 1, dtype=np.int8)
+    changes[line_starts[blanked]] = 1
+    changes[line_ends[blanked]] -= 1
+    chunk[np.cumsum(changes[:-1], dtype=np.int8).view(bool)] = SPACE
+
+
+def _parse_problem_line(path: str, chunk: np.ndarray, start: int) -> int:
+    line = chunk[start:start + np.argmax(chunk[start:] == NEWLINE)].tobytes().split()
+
+    if len(line) != 4 or line[1] != b'sp':
+        raise ValueError('{} has no valid problem line.'.format(path))
+
+    return int(line[2])
+
+
+def _parse_edges(path: str, chunk: np.ndarray, line_starts: np.ndarray, columns_numbers: Tuple[int, ...]) \
+        -> np.ndarray:
+    """
+    Parses every line of the chunk that is not blank into a row 'u v w'. The values on every
+    line are counted, and a line must have one of the columns_numbers of them. A missing
+    weight is 1.
+    """
+    preceded_by_space = np.concatenate(([True], chunk[:-1] <= SPACE))
+    value_starts = np.flatnonzero((chunk > SPACE) & preceded_by_space)
+    values_numbers = np.diff(np.searchsorted(value_starts, np.append(line_starts, len(chunk))))
+    values_numbers = values_numbers[values_numbers > 0]
+
+    if not np.isin(values_numbers, columns_numbers).all():
+        raise ValueError('{} contains a line that is no edge.'.format(path))
+
+    edges = np.ones((len(values_numbers), 3), dtype=np.int64)
+
+    # numpy parses a text of whitespace only as a single 0
+    if not len(values_numbers):
+        return edges
+
+    try:
+        numbers = np.fromstring(chunk.tobytes(), dtype=np.int64, sep=' ')
+    except ValueError:
+        raise ValueError('{} contains a line that is no edge.'.format(path)) from None
+
+    # a value that is no integer ends the parsing early
+    if len(numbers) != values_numbers.sum():
+        raise ValueError('{} contains a line that is no edge.'.format(path))
+
+    firsts = np.cumsum(values_numbers) - values_numbers
+    weighted = values_numbers == 3
+    edges[:, 0] = numbers[firsts]
+    edges[:, 1] = numbers[firsts + 1]
+    edges[weighted, 2] = numbers[firsts[weighted] + 2]
+
+    return edges
+
+
+def _concatenate(edges: List[np.ndarray]) -> List[np.ndarray]:
+    edges = np.concatenate(edges) if edges else np.empty((0, 3), dtype=np.int64)
+    return [edges[:, column] for column in range(3)]
+
+
+def _build(path: str,
+           vertices_number: int,
+           sources: np.ndarray,
+           targets: np.ndarray,
+           weights: np.ndarray) -> CsrGraph:
+    for vertices in (sources, targets):
+        invalid = np.flatnonzero((vertices < 0) | (vertices >= vertices_number))
+
+        if len(invalid):
+            raise ValueError('{} is no valid vertex of {}.'.format(str(vertices[invalid[0]]), path))
+
+    invalid = np.flatnonzero(weights < 1)
+
+    if len(invalid):
+        raise ValueError('{} is no valid edge weight.'.format(str(weights[invalid[0]])))
+
+    return CsrGraph.from_numpy_edges(vertices_number, sources, targets, weights)
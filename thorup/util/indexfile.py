@@ -0,0 +1,76 @@
+import mmap
+import struct
+import sys
+from typing import Dict, Sequence
+
+from thorup.util.sharedarrays import compute_layout
+
+INDEX_FILE_MAGIC = b'THORUPIX'
+INDEX_FILE_VERSION = 2
+
+# magic, version, byte order, number of arrays
+HEADER_FORMAT = '<8sIcxxxI'
+# name, typecode, item size, offset, length
+ENTRY_FORMAT = '<64scBxxxxxxQQ'
+
+
+class IndexFile:
+    """
+    Versioned binary file holding the named integer arrays of a built Thorup model.
+
+    The file starts with a header and a table of entries, one per array, followed by the
+    arrays in native byte order, each aligned to 8 bytes, so that they can be used in place
+    through a memory map.
+    """
+
+    @staticmethod
+    def write(path: str, arrays: Dict[str, Sequence[int]]) -> None:
+        table_size = struct.calcsize(HEADER_FORMAT) + struct.calcsize(ENTRY_FORMAT) * len(arrays)
+        layout, _ = compute_layout(arrays, table_size)
+
+        with open(path, 'wb') as file:
+            file.write(struct.pack(HEADER_FORMAT, INDEX_FILE_MAGIC, INDEX_FILE_VERSION,
+                                   sys.byteorder[0].encode(), len(arrays)))
+
+            for name, typecode, offset, length in layout:
+                file.write(struct.pack(ENTRY_FORMAT, name.encode(), typecode.encode(),
+                                       arrays[name].itemsize, offset, length))
+
+            for name, typecode, offset, length in layout:
+                file.write(bytes(offset - file.tell()))
+                file.write(memoryview(arrays[name]).cast('B'))
+
+    @staticmethod
+    def read(path: str) -> Dict[str, memoryview]:
+        """
+        Maps the file into memory read-only.
+        :return: typed memoryviews on the arrays of the file
+        """
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(buffer)
+        magic, version, byte_order, arrays_number = struct.unpack_from(HEADER_FORMAT, view)
+
+        if magic != INDEX_FILE_MAGIC:
+            raise ValueError('{} is no index file.'.format(path))
+
+        if version != INDEX_FILE_VERSION:
+            raise ValueError('{} has version {}, expected {}.'.format(path, version, INDEX_FILE_VERSION))
+
+        if byte_order != sys.byteorder[0].encode():
+            raise ValueError('{} was written on a machine with a different byte order.'.format(path))
+
+        arrays = {}
+        entry_offset = struct.calcsize(HEADER_FORMAT)
+
+        for _ in range(arrays_number):
+            name, typecode, item_size, offset, length = struct.unpack_from(ENTRY_FORMAT, view, entry_offset)
+            entry_offset += struct.calcsize(ENTRY_FORMAT)
+
+            if struct.calcsize(typecode.decode()) != item_size:
+                raise ValueError('{} stores items of a different size than this machine.'.format(path))
+
+            arrays[name.rstrip(b'\0').decode()] = view[offset:offset + item_size * length].cast(typecode.decode())
+
+        return arrays
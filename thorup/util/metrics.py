@@ -0,0 +1,49 @@
+import os
+from typing import Dict
+
+METRICS_ENVIRONMENT_VARIABLE = 'THORUP_METRICS'
+PHASES = ('minimum_spanning_tree', 'component_tree', 'unvisited_data_structure', 'query')
+OPERATIONS = ('find_shortest_paths', 'visit_node', 'visit', 'relax', 'expand', 'decrease_cost', 'split',
+              'bucket_scan', 'bucket_move')
+
+
+class Metrics:
+    """
+    Wall times of the phases and counts of the operations of a ThorupModel.
+
+    Operations on tree nodes are also counted per component hierarchy level of the node, the
+    bucket moves per level of the node owning the bucket.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.phase_seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.operation_counts: Dict[str, int] = dict.fromkeys(OPERATIONS, 0)
+        self.level_histogram: Dict[int, Dict[str, int]] = {}
+
+    def add_phase_seconds(self, phase: str, seconds: float) -> None:
+        self.phase_seconds[phase] += seconds
+
+    def count(self, operation: str, level: int = None, number: int = 1) -> None:
+        self.operation_counts[operation] += number
+
+        if level is not None:
+            level_counts = self.level_histogram.get(level)
+
+            if level_counts is None:
+                level_counts = self.level_histogram[level] = dict.fromkeys(OPERATIONS, 0)
+
+            level_counts[operation] += number
+
+    def to_dict(self) -> Dict:
+        return {'phase_seconds': dict(self.phase_seconds),
+                'operation_counts': dict(self.operation_counts),
+                'level_histogram': {level: {operation: number for operation, number in level_counts.items() if number}
+                                    for level, level_counts in sorted(self.level_histogram.items())}}
+
+    @staticmethod
+    def is_enabled_by_environment() -> bool:
+        """
+        Metrics are collected if the environment variable THORUP_METRICS is set to anything but 0.
+        """
+        return os.environ.get(METRICS_ENVIRONMENT_VARIABLE, '0') not in ('', '0')
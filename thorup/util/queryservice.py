@@ -0,0 +1,268 @@
+"""
+Local asyncio query service on an index file written by ThorupModel.save_index.
+
+Clients connect through a Unix socket or TCP and send one JSON request per line:
+
+    {"id": 1, "source": 0}
+    {"id": 2, "source": 0, "target": 5}
+    {"id": 3, "source": 0, "max_distance": 1000}
+
+and receive one JSON response per line as soon as it is ready, tagged with the id of its
+request, so that a connection can send many requests without waiting:
+
+    {"id": 1, "distances": [0, 3, ...]}
+    {"id": 2, "distance": 7, "path": [0, 4, 5]}
+    {"id": 3, "distances": {"0": 0, "4": 2, ...}}
+    {"id": 4, "error": "..."}
+
+Requests arriving within batch_window seconds are coalesced into a batch, whose requests are
+answered by a pool of worker processes, grouped by their source vertices so that repeated
+sources are searched once. The workers memory-map the same index file, so the built structures
+are shared by all of them through the page cache:
+
+    python -m thorup.util.queryservice graph.idx --socket /tmp/thorup.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Set, Tuple, Type
+
+from thorup.algs.thorup import ThorupModel
+from thorup.ds.unvisited import UnvisitedDataStructure, GabowUnvisitedDataStructure, MinTreeUnvisitedDataStructure
+
+BACKENDS = {'gabow': GabowUnvisitedDataStructure, 'min_tree': MinTreeUnvisitedDataStructure}
+
+# source vertex, target vertex or None, max_distance or None
+Request = Tuple[int, int, int]
+
+_service_model: ThorupModel = None
+
+
+class QueryService:
+    """
+    Answers shortest path requests from an index file in batches, with worker processes.
+    """
+
+    def __init__(self,
+                 index_path: str,
+                 unvisited_data_structure_type: Type[UnvisitedDataStructure] = GabowUnvisitedDataStructure,
+                 processes: int = None,
+                 batch_window: float = 0.005,
+                 maximum_batch_size: int = 256) -> None:
+        """
+        :param processes: number of worker processes, os.cpu_count() by default
+        :param batch_window: seconds to wait for further requests after the first one of a batch
+        """
+        super().__init__()
+        self.index_path: str = index_path
+        self.unvisited_data_structure_type: Type[UnvisitedDataStructure] = unvisited_data_structure_type
+        self.processes: int = processes or os.cpu_count() or 1
+        self.batch_window: float = batch_window
+        self.maximum_batch_size: int = maximum_batch_size
+        self.vertices_number: int = None
+        self.executor: ProcessPoolExecutor = None
+        self.pending: asyncio.Queue = None
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        # fails early on an invalid index file
+        self.vertices_number = ThorupModel.load_index(self.index_path).vertices_number
+        self.executor = ProcessPoolExecutor(self.processes, initializer=_load_index,
+                                            initargs=(self.index_path, self.unvisited_data_structure_type))
+        self.pending = asyncio.Queue()
+        self._run_task(self.dispatch_batches())
+
+    async def close(self) -> None:
+        for task in list(self.tasks):
+            task.cancel()
+
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown()
+
+    async def start_unix_server(self, path: str) -> asyncio.AbstractServer:
+        await self.start()
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    async def start_tcp_server(self, host: str, port: int) -> asyncio.AbstractServer:
+        await self.start()
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def query(self, source_vertex: int, target_vertex: int = None, max_distance: int = None) -> Dict:
+        """
+        Queues a request for the next batch.
+        :return: the response without the id
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.pending.put(((source_vertex, target_vertex, max_distance), future))
+        return await future
+
+    async def dispatch_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.pending.get()]
+            deadline = loop.time() + self.batch_window
+
+            while len(batch) < self.maximum_batch_size and loop.time() < deadline:
+                try:
+                    batch.append(await asyncio.wait_for(self.pending.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+
+            for chunk in split_batch(batch, self.processes):
+                self._run_task(self.answer_chunk(chunk))
+
+    async def answer_chunk(self, chunk: List[Tuple[Request, asyncio.Future]]) -> None:
+        try:
+            responses = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _answer_requests, [request for request, _ in chunk])
+        except Exception as exception:
+            responses = [{'error': str(exception)}] * len(chunk)
+
+        for (_, future), response in zip(chunk, responses):
+            if not future.done():
+                future.set_result(response)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        answers = set()
+
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                if line.strip():
+                    answer = asyncio.ensure_future(self.answer_line(line, writer))
+                    answers.add(answer)
+                    answer.add_done_callback(answers.discard)
+
+            await asyncio.gather(*answers)
+        finally:
+            writer.close()
+
+    async def answer_line(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        request_id = None
+
+        try:
+            request = json.loads(line)
+            request_id = request.get('id') if isinstance(request, dict) else None
+            response = await self.query(*parse_request(request, self.vertices_number))
+        except ValueError as error:
+            response = {'error': str(error)}
+
+        writer.write(json.dumps(dict(id=request_id, **response)).encode() + b'\n')
+        await writer.drain()
+
+    def _run_task(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+def parse_request(request: Dict, vertices_number: int) -> Request:
+    if not isinstance(request, dict):
+        raise ValueError('{} is no valid request.'.format(json.dumps(request)))
+
+    values = []
+
+    for name, required in (('source', True), ('target', False), ('max_distance', False)):
+        value = request.get(name)
+
+        if value is None and not required:
+            values.append(None)
+        elif isinstance(value, int) and not isinstance(value, bool) and value >= 0 and \
+                (name == 'max_distance' or value < vertices_number):
+            values.append(value)
+        else:
+            raise ValueError('{} is no valid {}.'.format(json.dumps(value), name))
+
+    return values[0], values[1], values[2]
+
+
+def split_batch(batch: Sequence[Tuple[Request, asyncio.Future]], chunks_number: int) \
+        -> List[List[Tuple[Request, asyncio.Future]]]:
+    """
+    Distributes the requests of a batch over at most chunks_number chunks, keeping the requests
+    with the same source vertex together.
+    """
+    groups = {}
+
+    for item in batch:
+        groups.setdefault(item[0][0], []).append(item)
+
+    chunks = [[] for _ in range(min(chunks_number, len(groups)))]
+
+    for i, group in enumerate(groups.values()):
+        chunks[i % len(chunks)].extend(group)
+
+    return chunks
+
+
+def answer_requests(model: ThorupModel, requests: Sequence[Request]) -> List[Dict]:
+    """
+    Answers the requests in order, searching every source vertex of a single-source request once.
+    """
+    all_distances = {}
+    responses = []
+
+    for source_vertex, target_vertex, max_distance in requests:
+        try:
+            if target_vertex is not None:
+                distance, path = model.find_shortest_path(source_vertex, target_vertex)
+                responses.append({'distance': distance, 'path': path})
+            elif max_distance is not None:
+                responses.append({'distances': model.find_shortest_paths_within(source_vertex, max_distance)})
+            else:
+                if source_vertex not in all_distances:
+                    all_distances[source_vertex] = model.find_shortest_paths(source_vertex)
+
+                responses.append({'distances': all_distances[source_vertex]})
+        except (AttributeError, ValueError) as error:
+            responses.append({'error': str(error)})
+
+    return responses
+
+
+def _load_index(index_path: str, unvisited_data_structure_type: Type[UnvisitedDataStructure]) -> None:
+    global _service_model
+    _service_model = ThorupModel.load_index(index_path, unvisited_data_structure_type)
+
+
+def _answer_requests(requests: Sequence[Request]) -> List[Dict]:
+    return answer_requests(_service_model, requests)
+
+
+async def serve(service: QueryService, socket_path: str = None, host: str = None, port: int = None) -> None:
+    if socket_path:
+        server = await service.start_unix_server(socket_path)
+    else:
+        server = await service.start_tcp_server(host, port)
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(arguments: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('index', help='index file written by ThorupModel.save_index')
+    parser.add_argument('--socket', help='Unix socket to listen on, instead of TCP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8642)
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='gabow')
+    parser.add_argument('--processes', type=int, help='worker processes, one per CPU by default')
+    parser.add_argument('--batch-window', type=float, default=0.005, help='seconds to collect a batch')
+    arguments = parser.parse_args(arguments)
+
+    service = QueryService(arguments.index, BACKENDS[arguments.backend], arguments.processes, arguments.batch_window)
+    asyncio.run(serve(service, arguments.socket, arguments.host, arguments.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Sequence, Tuple
+
+Layout = List[Tuple[str, str, int, int]]
+
+
+class SharedArrays:
+    """
+    Named integer arrays packed into a single shared memory block, so that worker processes
+    can attach to them instead of receiving pickled copies.
+    """
+
+    def __init__(self, shared_memory: SharedMemory, layout: Layout) -> None:
+        super().__init__()
+        self.shared_memory: SharedMemory = shared_memory
+        self.layout: Layout = layout
+        self.arrays: Dict[str, memoryview] = {}
+
+        for name, typecode, offset, length in layout:
+            item_size = array(typecode).itemsize
+            self.arrays[name] = shared_memory.buf[offset:offset + item_size * length].cast(typecode)
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.arrays[name]
+
+    def get_name(self) -> str:
+        return self.shared_memory.name
+
+    def close(self) -> None:
+        for view in self.arrays.values():
+            view.release()
+
+        self.arrays = {}
+        self.shared_memory.close()
+
+    def unlink(self) -> None:
+        self.shared_memory.unlink()
+
+    @staticmethod
+    def create(arrays: Dict[str, Sequence[int]]) -> 'SharedArrays':
+        layout, size = compute_layout(arrays)
+        shared_memory = SharedMemory(create=True, size=max(size, 1))
+
+        for name, typecode, offset, length in layout:
+            data = arrays[name].tobytes()
+            shared_memory.buf[offset:offset + len(data)] = data
+
+        return SharedArrays(shared_memory, layout)
+
+    @staticmethod
+    def attach(name: str, layout: Layout) -> 'SharedArrays':
+        return SharedArrays(SharedMemory(name=name), layout)
+
+
+def compute_layout(arrays: Dict[str, Sequence[int]], start: int = 0) -> Tuple[Layout, int]:
+    """
+    Places the arrays, which may be arrays or typed memoryviews, one after the other from the
+    byte offset start on, each aligned to 8 bytes.
+    :return: the layout and the end offset of the last array
+    """
+    layout = []
+    size = start
+
+    for name, values in arrays.items():
+        size += -size % 8
+        layout.append((name, get_typecode(values), size, len(values)))
+        size += values.itemsize * len(values)
+
+    return layout, size
+
+
+def get_typecode(values: Sequence[int]) -> str:
+    return values.typecode if isinstance(values, array) else values.format
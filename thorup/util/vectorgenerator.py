@@ -0,0 +1,178 @@
+"""
+Seeded NumPy generators of large graphs, which emit the CSR arrays directly instead of
+adding edges one by one. Every generated graph is connected and has neither self-loops
+nor parallel edges. Edge weights are integers from 1 to maximum_edge_weight, drawn from
+one of the WEIGHT_DISTRIBUTIONS.
+"""
+from typing import Callable, Dict
+
+import numpy as np
+
+from thorup.ds.csrgraph import CsrGraph
+
+
+def _draw_uniform_weights(generator: np.random.Generator, size: int, maximum_edge_weight: int) -> np.ndarray:
+    return generator.integers(1, maximum_edge_weight, size, endpoint=True)
+
+
+def _draw_log_uniform_weights(generator: np.random.Generator, size: int, maximum_edge_weight: int) -> np.ndarray:
+    # about as many weights in every msb class, which spreads the component tree over all levels
+    exponents = generator.uniform(0, np.log2(maximum_edge_weight + 1), size)
+    return np.clip(np.exp2(exponents).astype(np.int64), 1, maximum_edge_weight)
+
+
+def _draw_unit_weights(generator: np.random.Generator, size: int, maximum_edge_weight: int) -> np.ndarray:
+    return np.ones(size, dtype=np.int64)
+
+
+WEIGHT_DISTRIBUTIONS: Dict[str, Callable[[np.random.Generator, int, int], np.ndarray]] = {
+    'uniform': _draw_uniform_weights,
+    'log_uniform': _draw_log_uniform_weights,
+    'unit': _draw_unit_weights}
+
+
+class VectorizedGraphGenerator(object):
+
+    @staticmethod
+    def generate_grid_graph(rows: int,
+                            columns: int,
+                            maximum_edge_weight: int,
+                            weight_distribution: str = 'uniform',
+                            seed: int = None) -> CsrGraph:
+        """
+        The vertex row * columns + column is connected to its right and lower neighbor.
+        """
+        vertices = np.arange(rows * columns, dtype=np.int64).reshape(rows, columns)
+        sources = np.concatenate((vertices[:, :-1].ravel(), vertices[:-1, :].ravel()))
+        targets = np.concatenate((vertices[:, 1:].ravel(), vertices[1:, :].ravel()))
+        weights = draw_weights(np.random.default_rng(seed), len(sources), maximum_edge_weight, weight_distribution)
+
+        return CsrGraph.from_numpy_edges(rows * columns, sources, targets, weights)
+
+    @staticmethod
+    def generate_geometric_graph(number_of_vertices: int,
+                                 average_degree: float,
+                                 maximum_edge_weight: int,
+                                 weight_distribution: str = 'euclidean',
+                                 seed: int = None) -> CsrGraph:
+        """
+        Road-like random geometric graph. The vertices are points in the unit square, which are
+        connected if their distance is at most the radius giving the average degree. A backbone
+        through the points in serpentine order of their grid cells keeps the graph connected.
+
+        Euclidean weights grow linearly with the distance, a radius long edge weighs half of
+        maximum_edge_weight.
+        """
+        generator = np.random.default_rng(seed)
+        radius = np.sqrt(average_degree / (np.pi * number_of_vertices))
+        cells_per_side = max(1, int(1 / radius))
+        points = generator.random((number_of_vertices, 2))
+        cells = np.minimum((points * cells_per_side).astype(np.int64), cells_per_side - 1)
+
+        # serpentine order of the cells, so that consecutive cells are adjacent
+        cell_columns = np.where(cells[:, 0] % 2 == 0, cells[:, 1], cells_per_side - 1 - cells[:, 1])
+        order = np.lexsort((cell_columns, cells[:, 0]))
+        points, cells = points[order], cells[order]
+        cell_ids = cells[:, 0] * cells_per_side + cells[:, 1]
+        cell_starts = np.searchsorted(cell_ids, np.arange(cells_per_side ** 2 + 1))
+
+        sources, targets = [np.arange(number_of_vertices - 1)], [np.arange(1, number_of_vertices)]
+
+        # the pairs of points in the same cell and in half of the neighboring cells
+        for row_offset, column_offset in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+            neighbor_rows, neighbor_columns = cells[:, 0] + row_offset, cells[:, 1] + column_offset
+            valid = (neighbor_rows < cells_per_side) & (neighbor_columns >= 0) & (neighbor_columns < cells_per_side)
+            pair_sources = np.flatnonzero(valid)
+            neighbor_cells = neighbor_rows[valid] * cells_per_side + neighbor_columns[valid]
+            starts, ends = cell_starts[neighbor_cells], cell_starts[neighbor_cells + 1]
+            counts = ends - starts
+            pair_sources = np.repeat(pair_sources, counts)
+            pair_targets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+            near = np.sum((points[pair_sources] - points[pair_targets]) ** 2, axis=1) <= radius ** 2
+            if not row_offset and not column_offset:
+                near &= pair_sources < pair_targets
+
+            sources.append(pair_sources[near])
+            targets.append(pair_targets[near])
+
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+
+        if weight_distribution == 'euclidean':
+            distances = np.sqrt(np.sum((points[sources] - points[targets]) ** 2, axis=1))
+            weights = np.clip(np.ceil(distances / (2 * radius) * maximum_edge_weight).astype(np.int64),
+                              1, maximum_edge_weight)
+        else:
+            weights = draw_weights(generator, len(sources), maximum_edge_weight, weight_distribution)
+
+        return CsrGraph.from_numpy_edges(number_of_vertices, sources, targets, weights)
+
+    @staticmethod
+    def generate_power_law_graph(number_of_vertices: int,
+                                 edges_per_vertex: float,
+                                 maximum_edge_weight: int,
+                                 exponent: float = 2.5,
+                                 weight_distribution: str = 'uniform',
+                                 seed: int = None) -> CsrGraph:
+        """
+        Chung-Lu graph whose degrees follow a power law with the exponent, which must exceed 2,
+        on top of a random spanning tree that keeps it connected.
+        """
+        if exponent <= 2:
+            raise ValueError('{} is no valid power law exponent.'.format(str(exponent)))
+
+        generator = np.random.default_rng(seed)
+        edges_number = int(number_of_vertices * edges_per_vertex)
+
+        # both endpoints are drawn proportionally to the expected degrees (i + 1) ** -(1 / (exponent - 1))
+        # of the vertices i, by inverting the continuous approximation of their distribution function
+        power = 1 - 1 / (exponent - 1)
+        uniforms = generator.random(2 * edges_number)
+        endpoints = (1 + uniforms * ((number_of_vertices + 1) ** power - 1)) ** (1 / power)
+        endpoints = np.minimum(endpoints.astype(np.int64) - 1, number_of_vertices - 1)
+
+        tree_sources, tree_targets = generate_random_tree(generator, number_of_vertices)
+        sources = np.concatenate((tree_sources, endpoints[:edges_number]))
+        targets = np.concatenate((tree_targets, endpoints[edges_number:]))
+        weights = draw_weights(generator, len(sources), maximum_edge_weight, weight_distribution)
+
+        return CsrGraph.from_numpy_edges(number_of_vertices, sources, targets, weights)
+
+    @staticmethod
+    def generate_connected_random_graph(number_of_vertices: int,
+                                        edges_per_vertex: float,
+                                        maximum_edge_weight: int,
+                                        weight_distribution: str = 'uniform',
+                                        seed: int = None) -> CsrGraph:
+        """
+        Random spanning tree plus uniformly random edges.
+        """
+        generator = np.random.default_rng(seed)
+        edges_number = int(number_of_vertices * edges_per_vertex)
+
+        tree_sources, tree_targets = generate_random_tree(generator, number_of_vertices)
+        sources = np.concatenate((tree_sources, generator.integers(0, number_of_vertices, edges_number)))
+        targets = np.concatenate((tree_targets, generator.integers(0, number_of_vertices, edges_number)))
+        weights = draw_weights(generator, len(sources), maximum_edge_weight, weight_distribution)
+
+        return CsrGraph.from_numpy_edges(number_of_vertices, sources, targets, weights)
+
+
+def generate_random_tree(generator: np.random.Generator, number_of_vertices: int):
+    """
+    :return: the sources and targets of a random tree, in which every vertex but 0 is connected
+    to an earlier one
+    """
+    targets = np.arange(1, number_of_vertices)
+    sources = (generator.random(number_of_vertices - 1) * targets).astype(np.int64)
+    return sources, targets
+
+
+def draw_weights(generator: np.random.Generator,
+                 size: int,
+                 maximum_edge_weight: int,
+                 weight_distribution: str) -> np.ndarray:
+    if weight_distribution not in WEIGHT_DISTRIBUTIONS:
+        raise ValueError('{} is no weight distribution.'.format(weight_distribution))
+
+    return WEIGHT_DISTRIBUTIONS[weight_distribution](generator, size, maximum_edge_weight)